@@ -0,0 +1,235 @@
+"""Admission control: concurrency limits, token-bucket rate limits and a bounded wait queue.
+
+A Limiter admits work for a key (the X-User-Id) when the key's token bucket
+has a token and both the key and the whole process are under their
+concurrency limits. Work that cannot start yet waits in one FIFO queue,
+bounded in length and in wait time. Whatever cannot be admitted within those
+bounds is rejected with Rejected at once, so a burst from one client turns
+into fast 429s, not growing latency for everyone.
+
+Two limiters are used by agent.py:
+- agui, around each POST /agui request (in UserIdMiddleware), held until
+  its stream ends;
+- tools, around each tool call (in ToolBudget), so one user's concurrent
+  tool calls cannot take every pool connection.
+
+Limits are per process; with WEB_CONCURRENCY workers the global limits
+apply to each worker.
+
+Configuration (environment), as `name=value` pairs:
+    ADMISSION_AGUI=concurrent=32,per_user=2,rate=2,burst=10,queue=64,wait_ms=2000
+    ADMISSION_TOOLS=concurrent=10,per_user=4,queue=128,wait_ms=5000
+`rate` is tokens per second per key (0 = no rate limit). `burst` is the
+bucket size. A `concurrent` or `per_user` of 0 means no limit. `queue` is
+the number of waiters (0 = reject instead of waiting). `wait_ms` is the
+longest wait (0 = until admitted).
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Hashable
+
+import metrics
+
+LIMIT_KEYS = ('concurrent', 'per_user', 'rate', 'burst', 'queue', 'wait_ms')
+
+# Idle keys are forgotten once more than this many are tracked
+MAX_TRACKED_KEYS = 10_000
+
+
+def parse_limits(spec: str) -> Dict[str, float]:
+    """'concurrent=32,per_user=2,...' -> {'concurrent': 32.0, 'per_user': 2.0, ...}"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, value = item.partition('=')
+        if name.strip() not in LIMIT_KEYS:
+            raise ValueError(f"unknown admission limit {name.strip()!r}; use {', '.join(LIMIT_KEYS)}")
+        limits[name.strip()] = float(value)
+    return limits
+
+
+class Rejected(Exception):
+    """Work shed by a Limiter; `reason` is rate, queue_full or timeout"""
+
+    def __init__(self, limiter: str, reason: str, retry_after: float):
+        super().__init__(f"{limiter}: {reason}")
+        self.limiter = limiter
+        self.reason = reason
+        self.retry_after = retry_after
+
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Take a token; returns 0, or the seconds until one is available (nothing taken)"""
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def refund(self):
+        """Give back a token taken for work that was then shed"""
+        self.tokens = min(self.burst, self.tokens + 1)
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.burst
+
+
+class _Key:
+    __slots__ = ('bucket', 'active', 'waiting')
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.active = 0
+        self.waiting = 0
+
+
+class Limiter:
+    """Per-key and global concurrency limits, per-key token buckets and a bounded FIFO wait queue"""
+
+    def __init__(self, name: str, concurrent: float = 0, per_user: float = 0, rate: float = 0, burst: float = 1,
+                 queue: float = 0, wait_ms: float = 0):
+        self.name = name
+        self.concurrent = int(concurrent)
+        self.per_user = int(per_user)
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_queue = int(queue)
+        self.wait_ms = wait_ms
+        self._keys: Dict[Hashable, _Key] = {}
+        self._queue: deque = deque()  # (key state, future), oldest first
+        self.active = 0
+        self.admitted = 0
+        self.queued = 0
+        self.max_queue_depth = 0
+        self.rejected = {'rate': 0, 'queue_full': 0, 'timeout': 0}
+
+    def _key(self, key: Hashable) -> _Key:
+        state = self._keys.get(key)
+        if state is None:
+            if len(self._keys) >= MAX_TRACKED_KEYS:
+                self._forget_idle()
+            state = self._keys[key] = _Key(TokenBucket(self.rate, self.burst) if self.rate > 0 else None)
+        return state
+
+    def _forget_idle(self):
+        now = time.monotonic()
+        for key, state in list(self._keys.items()):
+            if not state.active and not state.waiting and (state.bucket is None or state.bucket.is_full(now)):
+                del self._keys[key]
+
+    def _can_start(self, state: _Key) -> bool:
+        return ((not self.concurrent or self.active < self.concurrent)
+                and (not self.per_user or state.active < self.per_user))
+
+    def _start(self, state: _Key):
+        self.active += 1
+        state.active += 1
+        self.admitted += 1
+
+    def _refund(self, state: _Key):
+        # Work that never ran does not count against the rate: only admitted work spends a token
+        if state.bucket is not None:
+            state.bucket.refund()
+
+    def _reject(self, reason: str, retry_after: float):
+        self.rejected[reason] += 1
+        metrics.ADMISSION_REJECTED.inc(self.name, reason)
+        raise Rejected(self.name, reason, retry_after)
+
+    def _release(self, state: _Key):
+        self.active -= 1
+        state.active -= 1
+        # Hand freed capacity to the oldest waiters that can use it; a waiter held back by its
+        # own per-user limit does not block the ones behind it
+        for entry in list(self._queue):
+            if self.concurrent and self.active >= self.concurrent:
+                break
+            waiter, future = entry
+            if future.done():
+                continue
+            if self._can_start(waiter):
+                self._queue.remove(entry)
+                waiter.waiting -= 1
+                self._start(waiter)
+                future.set_result(None)
+
+    async def acquire(self, key: Hashable) -> _Key:
+        """Admit one unit of work for key, waiting in the queue if needed; raises Rejected"""
+        state = self._key(key)
+        if state.bucket is not None:
+            wait = state.bucket.take(time.monotonic())
+            if wait:
+                self._reject('rate', wait)
+        if self._can_start(state):
+            self._start(state)
+            return state
+        if len(self._queue) >= self.max_queue:
+            self._refund(state)
+            self._reject('queue_full', self.wait_ms / 1000)
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (state, future)
+        self._queue.append(entry)
+        state.waiting += 1
+        self.queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.wait_ms / 1000 if self.wait_ms > 0 else None):
+                await future
+        except (TimeoutError, asyncio.CancelledError) as exc:
+            if future.done() and not future.cancelled():
+                # Admitted just as the wait ended: give the slot back
+                self._release(state)
+            else:
+                self._queue.remove(entry)
+                state.waiting -= 1
+                self._refund(state)
+            if isinstance(exc, TimeoutError):
+                self._reject('timeout', self.wait_ms / 1000)
+            raise
+        finally:
+            metrics.ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - started, self.name)
+        return state
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    @asynccontextmanager
+    async def slot(self, key: Hashable):
+        state = await self.acquire(key)
+        try:
+            yield
+        finally:
+            self._release(state)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'limits': {'concurrent': self.concurrent, 'per_user': self.per_user, 'rate': self.rate,
+                       'burst': self.burst, 'queue': self.max_queue, 'wait_ms': self.wait_ms},
+            'active': self.active,
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'tracked_users': len(self._keys),
+            'admitted': self.admitted,
+            'queued': self.queued,
+            'rejected': dict(self.rejected),
+        }
@@ -0,0 +1,298 @@
+"""Vectorized glucose/mood/meal trend analytics for get_health_insights.
+
+One query pulls the user's last 90 days as columnar arrays (epoch seconds
+plus values, aggregated server-side with array_agg over the (user_id, time)
+indexes). Everything after that is NumPy: per-window glucose statistics,
+hour-of-day and day-of-week patterns, post-meal excursions (meal_entry
+joined to glucose_reading by time window via searchsorted) and daily
+mood/stress correlations. Each series is capped at `max_points` rows, so
+the work per call stays bounded for users with years of dense CGM data.
+
+The 365-day window never touches raw rows: it is computed from the
+health_daily_aggregate buckets (one row per logged day, see aggregates.py).
+
+Timestamps are stored as naive local times, so epoch seconds here are
+"local" epochs and hour/day arithmetic needs no time-zone conversion.
+"""
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional, Sequence
+
+import asyncpg
+import numpy as np
+
+import aggregates
+from aggregates import MOOD_SCORE_SQL
+
+WINDOWS = (30, 90)
+ROLLUP_WINDOW = 365
+LOW_THRESHOLD = 80   # same cut-offs as glucose.classify_glucose
+HIGH_THRESHOLD = 180
+PRE_MEAL_BASELINE_SECONDS = 30 * 60   # latest reading at most this long before a meal is its baseline
+POST_MEAL_SECONDS = 2 * 60 * 60       # excursion window after a meal
+MIN_CORRELATION_DAYS = 7
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+GLYCEMIC_LEVELS = ('low', 'medium', 'high')
+
+# Most recent `$3` rows per series since `$2`, returned oldest-first as arrays;
+# each aggregate subquery yields exactly one row, so the cross joins are 1x1x1
+SERIES_SQL = f"""
+    SELECT g.*, m.*, f.*
+    FROM (SELECT coalesce(array_agg(extract(epoch FROM timestamp)::float8 ORDER BY timestamp), '{{}}') AS glucose_t,
+                 coalesce(array_agg(value::float8 ORDER BY timestamp), '{{}}') AS glucose_v
+          FROM (SELECT timestamp, value FROM glucose_reading
+                WHERE user_id = $1 AND timestamp > $2 ORDER BY timestamp DESC LIMIT $3) recent) g
+    CROSS JOIN
+         (SELECT coalesce(array_agg(extract(epoch FROM date)::float8 ORDER BY date), '{{}}') AS mood_t,
+                 coalesce(array_agg(({MOOD_SCORE_SQL.format(col='mood')})::float8 ORDER BY date), '{{}}') AS mood_score,
+                 coalesce(array_agg(stress::float8 ORDER BY date), '{{}}') AS stress
+          FROM (SELECT date, mood, stress FROM mood_entry
+                WHERE user_id = $1 AND date > $2 ORDER BY date DESC LIMIT $3) recent) m
+    CROSS JOIN
+         (SELECT coalesce(array_agg(extract(epoch FROM date)::float8 ORDER BY date), '{{}}') AS meal_t,
+                 coalesce(array_agg(glycemic_impact ORDER BY date), '{{}}') AS meal_gi
+          FROM (SELECT date, glycemic_impact FROM meal_entry
+                WHERE user_id = $1 AND date > $2 ORDER BY date DESC LIMIT $3) recent) f
+"""
+
+
+def _epoch(moment: datetime) -> float:
+    return (moment - datetime(1970, 1, 1)).total_seconds()
+
+
+async def fetch_series(conn: asyncpg.Connection, user_id: str, days: int = max(WINDOWS),
+                       max_points: int = 100_000, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Columnar glucose/mood/meal arrays for the last `days` days, oldest first"""
+    now = now or datetime.now()
+    row = await conn.fetchrow(SERIES_SQL, user_id, now - timedelta(days=days), max_points)
+    series = {key: np.asarray(row[key], dtype=np.float64) for key in
+              ('glucose_t', 'glucose_v', 'mood_t', 'mood_score', 'stress', 'meal_t')}
+    series['meal_gi'] = np.asarray(row['meal_gi'], dtype=object)
+    series['now'] = _epoch(now)
+    series['truncated'] = any(len(series[key]) >= max_points for key in ('glucose_t', 'mood_t', 'meal_t'))
+    return series
+
+
+async def fetch_rollup(conn: asyncpg.Connection, user_id: str, days: int = ROLLUP_WINDOW) -> Dict[str, np.ndarray]:
+    """Daily bucket columns for the last `days` days as arrays, oldest first"""
+    rows = await aggregates.daily_buckets(conn, user_id, days=days)
+    rollup = {'day': np.array([row['day'].toordinal() for row in rows], dtype=np.int64)}
+    for col in aggregates.SUM_COLUMNS:
+        rollup[col] = np.array([row[col] for row in rows], dtype=np.float64)
+    return rollup
+
+
+def _round(value, digits: int = 1):
+    return None if value is None or not np.isfinite(value) else round(float(value), digits)
+
+
+def glucose_stats(values: np.ndarray) -> Dict[str, Any]:
+    """Mean, SD, CV and time in/below/above range (share of readings) for one window"""
+    if not len(values):
+        return {'readings': 0}
+    mean = values.mean()
+    sd = values.std(ddof=1) if len(values) > 1 else 0.0
+    return {
+        'readings': int(len(values)),
+        'mean': _round(mean),
+        'sd': _round(sd),
+        'cv_pct': _round(100 * sd / mean),
+        'time_in_range_pct': _round(100 * np.mean((values >= LOW_THRESHOLD) & (values <= HIGH_THRESHOLD))),
+        'time_below_pct': _round(100 * np.mean(values < LOW_THRESHOLD)),
+        'time_above_pct': _round(100 * np.mean(values > HIGH_THRESHOLD)),
+    }
+
+
+def glucose_slope(t: np.ndarray, values: np.ndarray) -> Optional[float]:
+    """Least-squares glucose trend in mg/dL per week, or None with under a day of readings"""
+    if len(values) < 2 or t[-1] - t[0] < 86400:
+        return None
+    slope = np.polyfit((t - t[0]) / (7 * 86400), values, 1)[0]
+    return _round(slope)
+
+
+def _group_means(keys: np.ndarray, values: np.ndarray, size: int) -> np.ndarray:
+    counts = np.bincount(keys, minlength=size)
+    sums = np.bincount(keys, weights=values, minlength=size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def glucose_patterns(t: np.ndarray, values: np.ndarray) -> Dict[str, Any]:
+    """Mean glucose by hour of day and by weekday"""
+    if not len(values):
+        return {}
+    seconds = t.astype(np.int64)
+    hourly = _group_means((seconds // 3600) % 24, values, 24)
+    # 1970-01-01 was a Thursday; shift so Monday is 0
+    weekday = _group_means((seconds // 86400 + 3) % 7, values, 7)
+    return {
+        'hourly_mean': [_round(value) for value in hourly],
+        'peak_hour': int(np.nanargmax(hourly)),
+        'lowest_hour': int(np.nanargmin(hourly)),
+        'weekday_mean': {day: _round(value) for day, value in zip(WEEKDAYS, weekday)},
+    }
+
+
+def post_meal_excursions(glucose_t: np.ndarray, glucose_v: np.ndarray, meal_t: np.ndarray,
+                         meal_gi: np.ndarray) -> Dict[str, Any]:
+    """Peak rise over the pre-meal baseline within POST_MEAL_SECONDS of each meal"""
+    if not len(meal_t) or not len(glucose_t):
+        return {'meals_analyzed': 0}
+    baseline_idx = np.searchsorted(glucose_t, meal_t, side='right') - 1
+    start = baseline_idx + 1
+    end = np.searchsorted(glucose_t, meal_t + POST_MEAL_SECONDS, side='right')
+    has_baseline = (baseline_idx >= 0) & (
+        meal_t - glucose_t[np.maximum(baseline_idx, 0)] <= PRE_MEAL_BASELINE_SECONDS
+    )
+    usable = has_baseline & (end > start)
+    if not usable.any():
+        return {'meals_analyzed': 0}
+    start, end, baseline_idx = start[usable], end[usable], baseline_idx[usable]
+    # Max over each [start, end) slice in one pass: reduceat on interleaved
+    # (start, end) bounds, keeping the even positions; the sentinel keeps
+    # end == len(glucose_v) a valid index
+    bounds = np.column_stack([start, end]).ravel()
+    peaks = np.maximum.reduceat(np.append(glucose_v, -np.inf), bounds)[::2]
+    excursions = peaks - glucose_v[baseline_idx]
+    labels = meal_gi[usable]
+    by_impact = {}
+    for level in GLYCEMIC_LEVELS:
+        mask = labels == level
+        if mask.any():
+            by_impact[level] = _round(excursions[mask].mean())
+    return {
+        'meals_analyzed': int(usable.sum()),
+        'avg_excursion': _round(excursions.mean()),
+        'avg_peak': _round(peaks.mean()),
+        'peak_over_180_pct': _round(100 * np.mean(peaks > HIGH_THRESHOLD)),
+        'avg_excursion_by_glycemic_impact': by_impact,
+    }
+
+
+def _pearson(x: np.ndarray, y: np.ndarray) -> Optional[float]:
+    if len(x) < MIN_CORRELATION_DAYS or x.std() == 0 or y.std() == 0:
+        return None
+    return _round(np.corrcoef(x, y)[0, 1], 2)
+
+
+def daily_correlations(series: Dict[str, Any], since: float) -> Dict[str, Any]:
+    """Pearson r between daily mood score, stress and mean glucose on days with both logged"""
+    first_day = int(since // 86400)
+    days = int(series['now'] // 86400) - first_day + 1
+
+    def daily(t, values):
+        mask = t >= since
+        return _group_means((t[mask] // 86400).astype(np.int64) - first_day, values[mask], days)
+
+    glucose = daily(series['glucose_t'], series['glucose_v'])
+    mood = daily(series['mood_t'], series['mood_score'])
+    stress = daily(series['mood_t'], series['stress'])
+    paired = ~np.isnan(glucose) & ~np.isnan(mood)
+    mood_days = ~np.isnan(mood)
+    return {
+        'paired_days': int(paired.sum()),
+        'mood_vs_glucose': _pearson(mood[paired], glucose[paired]),
+        'stress_vs_glucose': _pearson(stress[paired], glucose[paired]),
+        'stress_vs_mood': _pearson(stress[mood_days], mood[mood_days]),
+    }
+
+
+def rollup_window(rollup: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Glucose stats, monthly means and daily correlations from daily buckets"""
+    count = rollup['glucose_count']
+    n = count.sum()
+    result = {'days_logged': int(len(rollup['day']))}
+    if n:
+        total, squares = rollup['glucose_sum'].sum(), rollup['glucose_sq_sum'].sum()
+        mean = total / n
+        sd = np.sqrt(max(squares - total * total / n, 0.0) / (n - 1)) if n > 1 else 0.0
+        low, high = rollup['glucose_low_count'].sum(), rollup['glucose_high_count'].sum()
+        result['glucose'] = {
+            'readings': int(n),
+            'mean': _round(mean),
+            'sd': _round(sd),
+            'cv_pct': _round(100 * sd / mean),
+            'time_in_range_pct': _round(100 * (n - low - high) / n),
+            'time_below_pct': _round(100 * low / n),
+            'time_above_pct': _round(100 * high / n),
+        }
+    else:
+        result['glucose'] = {'readings': 0}
+
+    # Calendar months as year * 12 + month index
+    dates = [date.fromordinal(int(day)) for day in rollup['day']]
+    months = np.array([d.year * 12 + d.month - 1 for d in dates], dtype=np.int64)
+    monthly = []
+    if len(months):
+        keys = months - months.min()
+        size = int(keys.max()) + 1
+        glucose_n = np.bincount(keys, weights=count, minlength=size)
+        glucose_sum = np.bincount(keys, weights=rollup['glucose_sum'], minlength=size)
+        mood_n = np.bincount(keys, weights=rollup['mood_count'], minlength=size)
+        mood_sum = np.bincount(keys, weights=rollup['mood_score_sum'], minlength=size)
+        for key in np.flatnonzero(glucose_n + mood_n):
+            month = int(months.min() + key)
+            monthly.append({
+                'month': f'{month // 12}-{month % 12 + 1:02d}',
+                'glucose_mean': _round(glucose_sum[key] / glucose_n[key]) if glucose_n[key] else None,
+                'mood_score': _round(mood_sum[key] / mood_n[key]) if mood_n[key] else None,
+            })
+    result['monthly'] = monthly
+
+    paired = (count > 0) & (rollup['mood_count'] > 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        glucose_daily = rollup['glucose_sum'] / count
+        mood_daily = rollup['mood_score_sum'] / rollup['mood_count']
+        stress_daily = rollup['stress_sum'] / rollup['mood_count']
+    result['correlations'] = {
+        'paired_days': int(paired.sum()),
+        'mood_vs_glucose': _pearson(mood_daily[paired], glucose_daily[paired]),
+        'stress_vs_glucose': _pearson(stress_daily[paired], glucose_daily[paired]),
+    }
+    return result
+
+
+def compute(series: Dict[str, Any], rollup: Optional[Dict[str, np.ndarray]] = None,
+            windows: Sequence[int] = WINDOWS) -> Dict[str, Any]:
+    """All trend analytics from fetch_series() (and fetch_rollup()) output; pure CPU, safe to run in a thread"""
+    started = time.perf_counter()
+    glucose_t, glucose_v = series['glucose_t'], series['glucose_v']
+    result = {'windows': {}}
+    for days in windows:
+        since = series['now'] - days * 86400
+        result['windows'][f'{days}d'] = {
+            'glucose': glucose_stats(glucose_v[glucose_t >= since]),
+            'correlations': daily_correlations(series, since),
+        }
+    if rollup is not None:
+        result['windows'][f'{ROLLUP_WINDOW}d'] = rollup_window(rollup)
+    longest = series['now'] - max(windows) * 86400
+    in_longest = glucose_t >= longest
+    result['glucose_slope_per_week'] = glucose_slope(glucose_t[in_longest], glucose_v[in_longest])
+    result['glucose_patterns'] = glucose_patterns(glucose_t[in_longest], glucose_v[in_longest])
+    meals = series['meal_t'] >= longest
+    result['post_meal'] = post_meal_excursions(glucose_t, glucose_v, series['meal_t'][meals], series['meal_gi'][meals])
+    result['truncated'] = series['truncated']
+    result['compute_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+HEADLINE_FIELDS = ('readings', 'mean', 'time_in_range_pct', 'cv_pct')
+
+
+def headline(trends: Dict[str, Any]) -> Dict[str, Any]:
+    """The few compute() figures an insights answer uses, small enough to send to the model every turn"""
+    if 'windows' not in trends:
+        return trends
+    windows = {
+        name: {field: window['glucose'][field] for field in HEADLINE_FIELDS if field in window['glucose']}
+        for name, window in trends['windows'].items()
+    }
+    month = trends['windows'][f'{WINDOWS[0]}d']
+    return {
+        'glucose': windows,
+        'glucose_slope_per_week': trends['glucose_slope_per_week'],
+        'post_meal_excursion': trends['post_meal'].get('avg_excursion'),
+        'stress_vs_glucose': month['correlations']['stress_vs_glucose'],
+    }
@@ -0,0 +1,147 @@
+"""A bursting user next to steady ones, with admission control off and then on.
+
+The app runs as a real uvicorn process (benchmarks/stub_gemini.py) with the
+stub model. `--quiet-users` users each run `--turns` turns one after
+another, with `--think-ms` between them. Meanwhile one noisy user sends
+waves of `--burst` concurrent runs, `--wave-pause-ms` apart and ignoring
+Retry-After, until the quiet users are done. Every turn is the `insights`
+scenario, the one with the most database work.
+
+The whole run happens twice, once with ADMISSION_ENABLED=false and once with
+the configured limits. The report gives, for each run:
+- the quiet users' latency, time to the first event and errors;
+- the noisy user's runs by HTTP status, and the latency of those admitted;
+- the most pool connections seen in use (`db_pool` on /health);
+- when admission is on, the limiters' stats from /health.
+
+Usage (from the agents directory, against a scratch database):
+    uv run python benchmarks/bench_admission.py --burst 40 --quiet-users 5 --turns 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+
+import asyncpg
+import httpx
+
+from bench_cold_start import free_port
+from bench_e2e import AGENTS_DIR, latency_report, run_turn
+from common import BENCH_DB_URL, create_user, drop_user, seed_user
+from stub_gemini import SCENARIOS
+
+MESSAGE = SCENARIOS['insights'][0]
+
+
+async def quiet_user(client, user_id: str, turns: int, think_ms: float, results):
+    for turn in range(turns):
+        try:
+            results.append(await run_turn(client, user_id, f'bench-admission-{user_id}', turn, MESSAGE))
+        except httpx.HTTPError:
+            results.append({'total': None, 'first_event': None, 'first_text': None, 'ok': False, 'status': None})
+        await asyncio.sleep(think_ms / 1000)
+
+
+async def noisy_user(client, user_id: str, burst: int, pause_ms: float, done: asyncio.Event, results):
+    wave = 0
+    while not done.is_set():
+        async def one(index):
+            try:
+                return await run_turn(client, user_id, f'bench-admission-noisy-{wave}-{index}', 0, MESSAGE)
+            except httpx.HTTPError:
+                return {'total': None, 'first_event': None, 'first_text': None, 'ok': False, 'status': None}
+        results.extend(await asyncio.gather(*(one(index) for index in range(burst))))
+        wave += 1
+        await asyncio.sleep(pause_ms / 1000)
+
+
+async def sample_pool(client, interval: float, peak: list, done: asyncio.Event):
+    while not done.is_set():
+        try:
+            peak[0] = max(peak[0], (await client.get('/health')).json()['db_pool'].get('in_use', 0))
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(interval)
+
+
+async def run(args, enabled: bool, quiet, noisy):
+    port = free_port()
+    env = {**os.environ, 'LOG_LEVEL': 'WARNING', 'AGNO_TELEMETRY': 'false',
+           'ADMISSION_ENABLED': 'true' if enabled else 'false'}
+    server = subprocess.Popen(
+        [sys.executable, 'benchmarks/stub_gemini.py', '--port', str(port),
+         '--first-token-ms', str(args.first_token_ms), '--token-ms', str(args.token_ms)],
+        cwd=AGENTS_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    limits = httpx.Limits(max_connections=args.burst + len(quiet) + 2, max_keepalive_connections=args.burst)
+    try:
+        async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', timeout=120, limits=limits) as client:
+            started = time.perf_counter()
+            while True:
+                try:
+                    if (await client.get('/health')).json()['agent']['loaded']:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.perf_counter() - started > args.timeout:
+                    raise SystemExit('agent did not load; is Postgres reachable?')
+                await asyncio.sleep(0.1)
+
+            quiet_results, noisy_results, peak, done = [], [], [0], asyncio.Event()
+            background = [
+                asyncio.create_task(noisy_user(client, noisy, args.burst, args.wave_pause_ms, done, noisy_results)),
+                asyncio.create_task(sample_pool(client, 0.05, peak, done)),
+            ]
+            await asyncio.gather(*(quiet_user(client, user_id, args.turns, args.think_ms, quiet_results)
+                                   for user_id in quiet))
+            done.set()
+            await asyncio.gather(*background)
+            health = (await client.get('/health')).json()
+    finally:
+        server.terminate()
+        server.wait()
+
+    admitted = [result for result in noisy_results if result['status'] == 200]
+    return {
+        'quiet': latency_report(quiet_results),
+        'noisy': {'by_status': dict(Counter(str(result['status']) for result in noisy_results)),
+                  'admitted': latency_report(admitted) if admitted else None},
+        'db_pool_in_use_max': peak[0],
+        'admission': health['admission'],
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--burst", type=int, default=40, help="concurrent runs per noisy wave")
+    parser.add_argument("--wave-pause-ms", type=float, default=100)
+    parser.add_argument("--quiet-users", type=int, default=5)
+    parser.add_argument("--turns", type=int, default=10, help="turns per quiet user")
+    parser.add_argument("--think-ms", type=float, default=500, help="pause between a quiet user's turns")
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--token-ms", type=float, default=10)
+    parser.add_argument("--timeout", type=float, default=120, help="seconds to wait for the agent to load")
+    args = parser.parse_args()
+
+    conn = await asyncpg.connect(BENCH_DB_URL)
+    users = [await create_user(conn) for _ in range(args.quiet_users + 1)]
+    for index, user_id in enumerate(users):
+        await seed_user(conn, user_id, glucose=2000, moods=60, meals=200, days=90, seed=index)
+    noisy, quiet = users[0], users[1:]
+    report = {}
+    try:
+        for mode, enabled in (('off', False), ('on', True)):
+            report[mode] = await run(args, enabled, quiet, noisy)
+    finally:
+        for user_id in users:
+            await drop_user(conn, user_id)
+        await conn.close()
+    print(json.dumps({**report, **vars(args)}, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
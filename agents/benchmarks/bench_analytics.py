@@ -0,0 +1,99 @@
+"""Latency of the 30/90-day trend analytics for users with 1k to 1M glucose rows.
+
+Each user gets `rows` glucose readings spread evenly over `--days` days of
+history (a daily sine pattern plus noise), three meals and one mood entry per
+day. Reports the fetch (one query) and NumPy compute split, and end-to-end
+HealthDataManager.get_trend_analytics latency against ANALYTICS_BUDGET_MS.
+
+Usage (from the agents directory, against a scratch database):
+    uv run python migrations.py apply
+    uv run python benchmarks/bench_analytics.py --sizes 1000 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import timedelta
+
+import asyncpg
+
+from common import BENCH_DB_URL, create_user, drop_user, summarize, time_calls
+import analytics
+from agent import ANALYTICS_BUDGET_MS, ANALYTICS_MAX_POINTS, HealthDataManager
+
+
+async def seed(conn: asyncpg.Connection, user_id: str, rows: int, days: int):
+    await conn.execute("""
+        INSERT INTO glucose_reading (id, user_id, value, status, timestamp)
+        SELECT md5($1 || g), $1, v,
+               CASE WHEN v < 80 THEN 'low' WHEN v > 180 THEN 'high' ELSE 'normal' END, t
+        FROM (SELECT g, t,
+                     greatest(60, least(400, 130 + 40 * sin(extract(epoch FROM t) / 13751)
+                                             + 30 * (random() - 0.5)))::real AS v
+              FROM (SELECT g, localtimestamp - $3::interval * g / $2 AS t
+                    FROM generate_series(1, $2) g) s) s
+    """, user_id, rows, timedelta(days=days))
+    await conn.execute("""
+        INSERT INTO meal_entry (id, user_id, type, name, calories, carbs, protein, fat, fiber,
+                                glycemic_impact, date)
+        SELECT md5($1 || 'meal' || d || m), $1, (ARRAY['breakfast', 'lunch', 'dinner'])[m], 'Meal',
+               300 + m * 100, 20 * m, 20, 10, 5, (ARRAY['low', 'medium', 'high'])[1 + (d + m) % 3],
+               date_trunc('day', localtimestamp) - d * interval '1 day' + (4 + 5 * m) * interval '1 hour'
+        FROM generate_series(1, $2) d, generate_series(1, 3) m
+    """, user_id, days)
+    await conn.execute("""
+        INSERT INTO mood_entry (id, user_id, mood, energy, stress, date)
+        SELECT md5($1 || 'mood' || d), $1, (ARRAY['great', 'good', 'okay', 'poor', 'terrible'])[1 + d % 5],
+               1 + d % 10, 1 + (d * 7) % 10, localtimestamp - d * interval '1 day'
+        FROM generate_series(1, $2) d
+    """, user_id, days)
+    await conn.execute('ANALYZE glucose_reading; ANALYZE mood_entry; ANALYZE meal_entry')
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--days", type=int, default=3 * 365, help="history span per user")
+    parser.add_argument("--iterations", type=int, default=30)
+    args = parser.parse_args()
+
+    manager = HealthDataManager(BENCH_DB_URL)
+    pool = await manager.connect()
+    results = {'budget_ms': ANALYTICS_BUDGET_MS, 'max_points': ANALYTICS_MAX_POINTS}
+    for rows in args.sizes:
+        async with pool.acquire() as conn:
+            user_id = await create_user(conn)
+        try:
+            async with pool.acquire() as conn:
+                started = time.perf_counter()
+                await seed(conn, user_id, rows, args.days)
+                seeded = time.perf_counter() - started
+                fetch = []
+                for _ in range(args.iterations):
+                    started = time.perf_counter()
+                    series = await analytics.fetch_series(conn, user_id, max_points=ANALYTICS_MAX_POINTS)
+                    fetch.append(time.perf_counter() - started)
+            compute = []
+            for _ in range(args.iterations):
+                started = time.perf_counter()
+                result = analytics.compute(series)
+                compute.append(time.perf_counter() - started)
+            end_to_end = await time_calls(manager.get_trend_analytics, args.iterations, user_id)
+            results[f'{rows}_rows'] = {
+                'seed_s': round(seeded, 1),
+                'glucose_rows_90d': len(series['glucose_t']),
+                'truncated': series['truncated'],
+                'fetch': summarize(fetch),
+                'compute': summarize(compute),
+                'get_trend_analytics': summarize(end_to_end),
+                'sample': result['windows']['30d'],
+            }
+        finally:
+            async with pool.acquire() as conn:
+                await drop_user(conn, user_id)
+    await manager.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,141 @@
+"""Cold start: the import-time profile of agent.py, and time from process start to the first ready request.
+
+The profile comes from `python -X importtime -c "import agent"`. It lists
+the top-level packages by cumulative import time. It also checks that
+agno, google-genai, SQLAlchemy and psycopg are not imported at startup (the
+agent loads them in the background).
+
+Time to ready starts `python agent.py` (ENV=prod, so there is no reloader)
+`--runs` times per mode. It polls the server every few ms and records when
+each of these first happens:
+    live          GET /health/live answers
+    first_agui    a fast-path /agui glucose message is stored and answered
+    agent_loaded  /health reports the agno agent loaded
+    ready         GET /health/ready returns 200
+Modes: the default background agent load, and AGENT_EAGER_LOAD=true (the
+agent is built before the server accepts requests, as before).
+
+Usage (from the agents directory, against a scratch database):
+    uv run python benchmarks/bench_cold_start.py --runs 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from common import BENCH_DB_URL, create_user, drop_user
+import asyncpg
+
+AGENTS_DIR = Path(__file__).resolve().parent.parent
+DEFERRED = ('agno', 'google.genai', 'sqlalchemy', 'psycopg')
+MILESTONES = ('live', 'first_agui', 'agent_loaded', 'ready')
+
+
+def import_profile(top: int):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import agent, sys; print(",".join(sys.modules))'],
+        cwd=AGENTS_DIR, capture_output=True, text=True, check=True,
+    )
+    modules = set(result.stdout.strip().splitlines()[-1].split(','))
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        # Two-space indent per nesting level; keep only modules imported directly by the interpreter or agent.py
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth <= 1:
+            packages[name.strip()] = max(packages.get(name.strip(), 0), int(cumulative))
+    ranked = sorted(packages.items(), key=lambda item: -item[1])
+    return {
+        'import_agent_ms': round(packages.get('agent', 0) / 1000, 1),
+        'top_ms': {name: round(us / 1000, 1) for name, us in ranked[:top] if name != 'agent'},
+        'deferred_not_imported': {name: name not in modules for name in DEFERRED},
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def start_once(user_id: str, eager: bool, timeout: float):
+    port = free_port()
+    env = {**os.environ, 'ENV': 'prod', 'PORT': str(port), 'LOG_LEVEL': 'WARNING',
+           'AGENT_EAGER_LOAD': 'true' if eager else 'false'}
+    body = {'threadId': 't', 'runId': 'r', 'state': {}, 'tools': [], 'context': [], 'forwardedProps': {},
+            'messages': [{'id': 'm', 'role': 'user', 'content': 'glucose 123'}]}
+    seen = {}
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, 'agent.py'], cwd=AGENTS_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', timeout=5) as client:
+            while len(seen) < len(MILESTONES) and time.perf_counter() - started < timeout:
+                try:
+                    if 'live' not in seen and (await client.get('/health/live')).status_code == 200:
+                        seen['live'] = time.perf_counter() - started
+                    if 'live' in seen and 'first_agui' not in seen:
+                        response = await client.post('/agui', json=body, headers={'X-User-Id': user_id})
+                        if response.status_code == 200 and 'RUN_FINISHED' in response.text:
+                            seen['first_agui'] = time.perf_counter() - started
+                    if 'live' in seen and 'agent_loaded' not in seen:
+                        if (await client.get('/health')).json()['agent']['loaded']:
+                            seen['agent_loaded'] = time.perf_counter() - started
+                    if 'live' in seen and 'ready' not in seen:
+                        if (await client.get('/health/ready')).status_code == 200:
+                            seen['ready'] = time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.005)
+    finally:
+        server.terminate()
+        server.wait()
+    return seen
+
+
+async def time_to_ready(user_id: str, eager: bool, runs: int, timeout: float):
+    samples = {milestone: [] for milestone in MILESTONES}
+    for _ in range(runs):
+        seen = await start_once(user_id, eager, timeout)
+        for milestone in MILESTONES:
+            if milestone in seen:
+                samples[milestone].append(seen[milestone])
+    return {
+        f'{milestone}_ms': round(statistics.median(values) * 1000) if values else None
+        for milestone, values in samples.items()
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12)
+    parser.add_argument("--timeout", type=float, default=30, help="seconds to wait for all milestones per run")
+    args = parser.parse_args()
+
+    results = {'import_profile': import_profile(args.top)}
+    conn = await asyncpg.connect(BENCH_DB_URL)
+    user_id = await create_user(conn)
+    try:
+        results['time_to_ready_median'] = {
+            'background_load': await time_to_ready(user_id, False, args.runs, args.timeout),
+            'eager_load': await time_to_ready(user_id, True, args.runs, args.timeout),
+        }
+    finally:
+        await drop_user(conn, user_id)
+        await conn.close()
+    print(json.dumps({**results, **vars(args)}, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
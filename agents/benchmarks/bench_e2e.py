@@ -0,0 +1,293 @@
+"""End-to-end load test: concurrent AG-UI sessions against the real server with a scripted model.
+
+The app from agent.py runs as a real uvicorn process (benchmarks/stub_gemini.py)
+on the local Postgres, with StubGeminiClient in place of the Gemini API.
+It needs no network and no API key. Everything except the model call is
+real: the middleware, the fast path, agno's agent loop and tool dispatch,
+ToolBudget, HealthDataManager and its caches, and the write buffer.
+
+The run has three steps:
+1. Seed `--users` users with faker history.
+2. Open `--sessions` concurrent sessions. Each runs `--turns` turns, with
+   scenarios drawn from `--mix` by a seeded RNG (see stub_gemini.SCENARIOS).
+3. Report what was seen.
+
+The report covers:
+- per scenario and overall: latency and time to the first SSE event and to
+  the first text token (p50/p95/p99), plus errors;
+- per tool: calls and latency, from the server's /metrics histograms (the
+  difference over the run);
+- model turns;
+- Postgres connections sampled from pg_stat_activity: the agent's asyncpg
+  pool (application_name healthcare-agent-*) and all others, such as agno's
+  session store.
+
+Regression gate: `--save report.json` keeps a baseline. `--baseline
+report.json` compares against it. The exit status is 1 when p95/p99 latency,
+p95 time to first event or throughput is worse by more than `--tolerance`, or
+when the error rate exceeds `--max-error-rate`.
+
+Usage (from the agents directory, against a scratch database):
+    uv run python benchmarks/bench_e2e.py --sessions 20 --turns 10 --save baseline.json
+    uv run python benchmarks/bench_e2e.py --sessions 20 --turns 10 --baseline baseline.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+import asyncpg
+import httpx
+
+from bench_cold_start import free_port
+from common import BENCH_DB_URL, create_user, drop_user, seed_user, summarize
+from stub_gemini import SCENARIOS
+
+AGENTS_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_MIX = 'log_meal=3,mood_and_glucose=3,insights=2,meal_plan=1,chat=1,fast_glucose=2'
+SAMPLER_NAME = 'bench-e2e-sampler'
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for item in spec.split(','):
+        name, _, weight = item.partition('=')
+        if name.strip() not in SCENARIOS:
+            raise SystemExit(f"unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def histograms(metrics_text: str, name: str) -> Dict[str, Dict]:
+    """{first label value: {'buckets': {le: count}, 'sum': s, 'count': n}} for one histogram"""
+    series = defaultdict(lambda: {'buckets': {}, 'sum': 0.0, 'count': 0})
+    pattern = re.compile(rf'^{name}_(bucket|sum|count)\{{[a-z_]+="([^"]*)"(?:,le="([^"]+)")?\}} (\S+)$', re.MULTILINE)
+    for kind, label, le, value in pattern.findall(metrics_text):
+        if kind == 'bucket':
+            series[label]['buckets'][float(le)] = float(value)
+        else:
+            series[label][kind] = float(value)
+    return series
+
+
+def histogram_delta(before: Dict, after: Dict) -> Dict[str, Dict]:
+    """Calls, mean and bucket-bound p50/p95 per label over the run"""
+    result = {}
+    for label, end in after.items():
+        start = before.get(label, {'buckets': {}, 'sum': 0.0, 'count': 0})
+        count = end['count'] - start['count']
+        if count <= 0:
+            continue
+        buckets = sorted((le, cumulative - start['buckets'].get(le, 0)) for le, cumulative in end['buckets'].items())
+
+        def quantile(q):
+            # Upper bound of the bucket holding the q-th observation
+            for le, cumulative in buckets:
+                if cumulative >= q * count:
+                    return None if math.isinf(le) else round(le * 1000, 1)
+
+        result[label] = {
+            'calls': int(count),
+            'mean_ms': round((end['sum'] - start['sum']) / count * 1000, 2),
+            'p50_ms_le': quantile(0.5),
+            'p95_ms_le': quantile(0.95),
+        }
+    return result
+
+
+async def run_turn(client: httpx.AsyncClient, user_id: str, thread_id: str, turn: int, message: str):
+    body = {'threadId': thread_id, 'runId': f'{thread_id}-{turn}', 'state': {}, 'tools': [], 'context': [],
+            'forwardedProps': {}, 'messages': [{'id': f'{thread_id}-{turn}', 'role': 'user', 'content': message}]}
+    started = time.perf_counter()
+    first_event = first_text = None
+    finished = False
+    async with client.stream('POST', '/agui', json=body, headers={'X-User-Id': user_id}) as response:
+        async for line in response.aiter_lines():
+            if not line.startswith('data: '):
+                continue
+            now = time.perf_counter() - started
+            event = json.loads(line[6:])
+            first_event = first_event if first_event is not None else now
+            if first_text is None and event['type'] == 'TEXT_MESSAGE_CONTENT':
+                first_text = now
+            finished = finished or event['type'] == 'RUN_FINISHED'
+        ok = response.status_code == 200 and finished
+    return {'total': time.perf_counter() - started, 'first_event': first_event, 'first_text': first_text, 'ok': ok,
+            'status': response.status_code}
+
+
+async def run_session(client, user_id: str, session: int, turns: int, mix: Dict[str, float], seed: int, results):
+    rng = random.Random(seed * 100_003 + session)
+    names, weights = list(mix), list(mix.values())
+    for turn in range(turns):
+        scenario = rng.choices(names, weights)[0]
+        try:
+            result = await run_turn(client, user_id, f'bench-e2e-{seed}-{session}', turn, SCENARIOS[scenario][0])
+        except httpx.HTTPError:
+            result = {'total': None, 'first_event': None, 'first_text': None, 'ok': False}
+        results[scenario].append(result)
+
+
+async def sample_connections(url: str, database: str, interval: float, samples: List, done: asyncio.Event):
+    conn = await asyncpg.connect(url, server_settings={'application_name': SAMPLER_NAME})
+    try:
+        while not done.is_set():
+            rows = await conn.fetch("""
+                SELECT application_name LIKE 'healthcare-agent-%' AS agent_pool, state, count(*) AS n
+                FROM pg_stat_activity
+                WHERE datname = $1 AND backend_type = 'client backend' AND application_name <> $2
+                GROUP BY 1, 2
+            """, database, SAMPLER_NAME)
+            sample = defaultdict(int)
+            for row in rows:
+                group = 'agent_pool' if row['agent_pool'] else 'other'
+                sample[group] += row['n']
+                if row['state'] == 'active':
+                    sample[f'{group}_active'] += row['n']
+            samples.append(sample)
+            await asyncio.sleep(interval)
+    finally:
+        await conn.close()
+
+
+def summarize_connections(samples: List[Dict[str, int]]) -> Dict[str, Dict]:
+    keys = ('agent_pool', 'agent_pool_active', 'other', 'other_active')
+    return {
+        key: {'max': max((s[key] for s in samples), default=0),
+              'mean': round(sum(s[key] for s in samples) / len(samples), 1) if samples else 0}
+        for key in keys
+    }
+
+
+def latency_report(results: List[Dict]) -> Dict:
+    ok = [r for r in results if r['ok']]
+    report = {'turns': len(results), 'errors': len(results) - len(ok)}
+    for key in ('total', 'first_event', 'first_text'):
+        values = [r[key] for r in ok if r[key] is not None]
+        if values:
+            report[key] = summarize(values)
+    return report
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float, max_error_rate: float) -> List[str]:
+    """Human-readable regressions against a saved report (empty means the gate passes)"""
+    regressions = []
+    overall, base = report['overall'], baseline['overall']
+    for key, stat in (('total', 'p95_ms'), ('total', 'p99_ms'), ('first_event', 'p95_ms')):
+        now, then = overall.get(key, {}).get(stat), base.get(key, {}).get(stat)
+        if now is not None and then and now > then * (1 + tolerance):
+            regressions.append(f'{key} {stat}: {then} -> {now}')
+    if report['turns_per_sec'] < baseline['turns_per_sec'] * (1 - tolerance):
+        regressions.append(f"turns_per_sec: {baseline['turns_per_sec']} -> {report['turns_per_sec']}")
+    error_rate = overall['errors'] / max(overall['turns'], 1)
+    if error_rate > max_error_rate:
+        regressions.append(f'error rate {error_rate:.2%} > {max_error_rate:.2%}')
+    return regressions
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent AG-UI sessions")
+    parser.add_argument("--turns", type=int, default=10, help="turns per session")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario=weight,...")
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--token-ms", type=float, default=10)
+    parser.add_argument("--reply-tokens", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sample-ms", type=float, default=100, help="pg_stat_activity sampling interval")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds to wait for the agent to load")
+    parser.add_argument("--save", help="write the report here (a baseline for later runs)")
+    parser.add_argument("--baseline", help="compare against this report and exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--max-error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    conn = await asyncpg.connect(BENCH_DB_URL)
+    database = await conn.fetchval('SELECT current_database()')
+    users = [await create_user(conn) for _ in range(args.users)]
+    for index, user_id in enumerate(users):
+        await seed_user(conn, user_id, glucose=2000, moods=60, meals=200, days=90, seed=args.seed + index)
+
+    port = free_port()
+    # Scripted sessions send turns faster than people type; set ADMISSION_ENABLED=true to load-test the limits
+    env = {**os.environ, 'LOG_LEVEL': 'WARNING', 'AGNO_TELEMETRY': 'false',
+           'ADMISSION_ENABLED': os.getenv('ADMISSION_ENABLED', 'false')}
+    server = subprocess.Popen(
+        [sys.executable, 'benchmarks/stub_gemini.py', '--port', str(port),
+         '--first-token-ms', str(args.first_token_ms), '--token-ms', str(args.token_ms),
+         '--reply-tokens', str(args.reply_tokens)],
+        cwd=AGENTS_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    limits = httpx.Limits(max_connections=args.sessions, max_keepalive_connections=args.sessions)
+    try:
+        async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', timeout=60, limits=limits) as client:
+            started = time.perf_counter()
+            while True:
+                try:
+                    if (await client.get('/health')).json()['agent']['loaded']:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.perf_counter() - started > args.timeout:
+                    raise SystemExit('agent did not load; is Postgres reachable?')
+                await asyncio.sleep(0.1)
+
+            before = (await client.get('/metrics')).text
+            results, samples, done = defaultdict(list), [], asyncio.Event()
+            sampler = asyncio.create_task(sample_connections(BENCH_DB_URL, database, args.sample_ms / 1000, samples, done))
+            run_started = time.perf_counter()
+            await asyncio.gather(*(
+                run_session(client, users[session % len(users)], session, args.turns, mix, args.seed, results)
+                for session in range(args.sessions)
+            ))
+            elapsed = time.perf_counter() - run_started
+            done.set()
+            await sampler
+            after = (await client.get('/metrics')).text
+    finally:
+        server.terminate()
+        server.wait()
+        for user_id in users:
+            await drop_user(conn, user_id)
+        await conn.close()
+
+    all_results = [result for scenario in results.values() for result in scenario]
+    report = {
+        'turns_per_sec': round(len(all_results) / elapsed, 1),
+        'elapsed_s': round(elapsed, 2),
+        'overall': latency_report(all_results),
+        'by_scenario': {name: latency_report(results[name]) for name in mix if results[name]},
+        'tools': histogram_delta(histograms(before, 'tool_call_duration_seconds'),
+                                 histograms(after, 'tool_call_duration_seconds')),
+        'model': histogram_delta(histograms(before, 'model_call_duration_seconds'),
+                                 histograms(after, 'model_call_duration_seconds')),
+        'db_connections': summarize_connections(samples),
+        'config': {key: value for key, value in vars(args).items() if key not in ('save', 'baseline')},
+    }
+    if args.save:
+        Path(args.save).write_text(json.dumps(report, indent=2))
+    regressions = []
+    if args.baseline:
+        regressions = compare(report, json.loads(Path(args.baseline).read_text()), args.tolerance, args.max_error_rate)
+        report['regressions'] = regressions
+    elif report['overall']['errors'] / max(report['overall']['turns'], 1) > args.max_error_rate:
+        regressions = [f"{report['overall']['errors']} failed turns"]
+        report['regressions'] = regressions
+    print(json.dumps(report, indent=2))
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,166 @@
+"""Server memory while GET /export streams a user's whole history, per format.
+
+One user gets `--rows` glucose readings (plus three meals and one mood entry
+per day over `--days` days, as in bench_analytics.py). The app runs as a real
+uvicorn process (benchmarks/stub_gemini.py). Each format is downloaded in
+full while the server's resident set size is sampled from /proc. The client
+only counts what it receives.
+
+For each format, the report gives:
+- rows, bytes, seconds and rows per second;
+- server RSS before the export and at its peak, and the growth between them.
+
+A resume check then cuts an NDJSON download after `--cut` records and asks
+for the rest with `after=` from the last record received. The two parts must
+add up to the full export, with no record repeated at the seam.
+
+The exit status is 1 when any export grows the server's RSS by more than
+`--max-rss-growth-mb`, or when the resume check fails. Parquet is skipped
+without pyarrow.
+
+Usage (from the agents directory, against a scratch database):
+    uv run python benchmarks/bench_export.py --rows 1000000 --max-rss-growth-mb 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import asyncpg
+import httpx
+
+from bench_analytics import seed
+from bench_cold_start import free_port
+from common import BENCH_DB_URL, create_user, drop_user
+import export
+
+AGENTS_DIR = Path(__file__).resolve().parent.parent
+
+
+def rss_mb(pid: int) -> float:
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+async def sample_rss(pid: int, interval: float, peak: list, done: asyncio.Event):
+    while not done.is_set():
+        peak[0] = max(peak[0], rss_mb(pid))
+        await asyncio.sleep(interval)
+
+
+async def download(client, pid: int, user_id: str, params: dict, interval: float):
+    """Stream one export to nowhere; returns (newlines, bytes, seconds, rss before, rss peak)"""
+    before = rss_mb(pid)
+    peak, done = [before], asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(pid, interval, peak, done))
+    lines = size = 0
+    started = time.perf_counter()
+    try:
+        async with client.stream('GET', '/export', params=params, headers={'X-User-Id': user_id}) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                lines += chunk.count(b'\n')
+                size += len(chunk)
+    finally:
+        done.set()
+        await sampler
+    return lines, size, time.perf_counter() - started, before, peak[0]
+
+
+async def check_resume(client, user_id: str, total: int, cut: int):
+    """Cut an NDJSON download after `cut` records, then resume from the last one"""
+    head, buffer = [], b''
+    async with client.stream('GET', '/export', headers={'X-User-Id': user_id}) as response:
+        async for chunk in response.aiter_bytes():
+            buffer += chunk
+            *complete, buffer = buffer.split(b'\n')
+            head.extend(complete)
+            if len(head) >= cut:
+                break
+    head = head[:cut]
+    last = json.loads(head[-1])
+    token = export.resume_token(last['kind'], export.parse_time(last['at']), last['id'])
+    rest, first = 0, None
+    async with client.stream('GET', '/export', params={'after': token}, headers={'X-User-Id': user_id}) as response:
+        async for line in response.aiter_lines():
+            if line:
+                first = first or json.loads(line)
+                rest += 1
+    ok = len(head) + rest == total and first is not None and first['id'] != last['id']
+    return {'cut_after': len(head), 'resumed': rest, 'total': total, 'ok': ok}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="glucose rows for the exported user")
+    parser.add_argument("--days", type=int, default=3 * 365, help="history span")
+    parser.add_argument("--formats", nargs="+", default=list(export.ENCODERS), choices=list(export.ENCODERS))
+    parser.add_argument("--chunk-rows", type=int, default=5000, help="EXPORT_CHUNK_ROWS for the server")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=64)
+    parser.add_argument("--cut", type=int, default=123_457, help="records received before the resume check cuts")
+    parser.add_argument("--sample-ms", type=float, default=20)
+    parser.add_argument("--timeout", type=float, default=60, help="seconds to wait for the server")
+    args = parser.parse_args()
+    formats = [fmt for fmt in args.formats if fmt != 'parquet' or export.pq is not None]
+
+    conn = await asyncpg.connect(BENCH_DB_URL)
+    user_id = await create_user(conn)
+    started = time.perf_counter()
+    await seed(conn, user_id, args.rows, args.days)
+    total = args.rows + 4 * args.days
+    print(f"Seeded {total} rows in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    port = free_port()
+    env = {**os.environ, 'LOG_LEVEL': 'WARNING', 'AGNO_TELEMETRY': 'false', 'EXPORT_CHUNK_ROWS': str(args.chunk_rows)}
+    server = subprocess.Popen(
+        [sys.executable, 'benchmarks/stub_gemini.py', '--port', str(port)],
+        cwd=AGENTS_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    results = {}
+    try:
+        async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', timeout=300) as client:
+            started = time.perf_counter()
+            while True:
+                try:
+                    if (await client.get('/health')).json()['agent']['loaded']:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.perf_counter() - started > args.timeout:
+                    raise SystemExit('server did not start; is Postgres reachable?')
+                await asyncio.sleep(0.1)
+
+            for fmt in formats:
+                # Warm up the pool, the prepared statements and the encoder's allocator, so the run measures the export
+                await download(client, server.pid, user_id, {'kinds': 'mood', 'format': fmt}, args.sample_ms / 1000)
+                lines, size, seconds, before, peak = await download(
+                    client, server.pid, user_id, {'format': fmt}, args.sample_ms / 1000)
+                rows = lines - 1 if fmt == 'csv' else lines if fmt == 'ndjson' else total
+                results[fmt] = {
+                    'rows': rows, 'mb': round(size / 2**20, 1), 'seconds': round(seconds, 2),
+                    'rows_per_s': round(rows / seconds), 'rss_before_mb': round(before, 1),
+                    'rss_peak_mb': round(peak, 1), 'rss_growth_mb': round(peak - before, 1),
+                }
+            resume = await check_resume(client, user_id, total, args.cut)
+    finally:
+        server.terminate()
+        server.wait()
+        await drop_user(conn, user_id)
+        await conn.close()
+
+    over = [fmt for fmt, result in results.items() if result['rss_growth_mb'] > args.max_rss_growth_mb]
+    print(json.dumps({'total_rows': total, 'exports': results, 'resume': resume, 'over_ceiling': over,
+                      **vars(args)}, indent=2))
+    if over or not resume['ok']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
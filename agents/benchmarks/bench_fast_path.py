@@ -0,0 +1,83 @@
+"""Latency of "glucose 142" / "mood good energy 7 stress 3" through /agui: fast path vs model.
+
+Each request is a full AG-UI run through the app and middleware, timed
+until the RUN_FINISHED (or RUN_ERROR) frame arrives. The model path needs
+GOOGLE_API_KEY and is skipped without it; `--model-iterations` keeps that
+run short, since every call is a paid Gemini round trip.
+
+Usage (from the agents directory, against a scratch database):
+    uv run python benchmarks/bench_fast_path.py --iterations 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+
+from common import create_user, drop_user, summarize
+import agent
+import fast_path
+import logs
+
+MESSAGES = {'glucose': "glucose 142", 'mood': "mood good energy 7 stress 3"}
+
+
+def run_input(text: str, n: int) -> dict:
+    return {
+        "threadId": f"bench-{n}", "runId": f"run-{n}", "state": {}, "tools": [], "context": [],
+        "forwardedProps": {}, "messages": [{"id": f"m{n}", "role": "user", "content": text}],
+    }
+
+
+async def time_runs(client, user_id: str, text: str, iterations: int):
+    samples = []
+    for n in range(iterations):
+        started = time.perf_counter()
+        async with client.stream("POST", "/agui", json=run_input(text, n), headers={"X-User-Id": user_id}) as response:
+            async for line in response.aiter_lines():
+                if '"RUN_FINISHED"' in line:
+                    break
+                if '"RUN_ERROR"' in line:
+                    raise RuntimeError(line)
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--model-iterations", type=int, default=5)
+    args = parser.parse_args()
+
+    logs.setup_logging({'user_id': agent.current_user_id}, level="OFF")
+    started = time.perf_counter()
+    for _ in range(10000):
+        fast_path.match_message(MESSAGES['mood'])
+    results = {'match_us': round((time.perf_counter() - started) / 10000 * 1e6, 2)}
+
+    async with agent.app.router.lifespan_context(agent.app):
+        async with agent.health_db.get_connection() as conn:
+            user_id = await create_user(conn)
+        transport = httpx.ASGITransport(app=agent.app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+                for name, text in MESSAGES.items():
+                    await time_runs(client, user_id, text, 5)  # warm-up
+                    results[f'fast_path_{name}'] = await time_runs(client, user_id, text, args.iterations)
+                if os.getenv("GOOGLE_API_KEY"):
+                    agent.FAST_PATH_ENABLED = False
+                    for name, text in MESSAGES.items():
+                        results[f'model_{name}'] = await time_runs(client, user_id, text, args.model_iterations)
+                else:
+                    results['model'] = "skipped (GOOGLE_API_KEY not set)"
+        finally:
+            async with agent.health_db.get_connection() as conn:
+                await drop_user(conn, user_id)
+    print(json.dumps({**results, **vars(args)}, indent=2), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
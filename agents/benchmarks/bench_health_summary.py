@@ -0,0 +1,88 @@
+"""Latency of get_user_health_summary: legacy three-query path vs single round trip.
+
+Usage (from the agents directory, against a scratch database):
+    uv run python benchmarks/bench_health_summary.py --rows 20000 --iterations 300
+"""
+import argparse
+import asyncio
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import asyncpg
+
+from common import BENCH_DB_URL, create_user, drop_user, seed_user, summarize, time_calls
+from agent import HealthDataManager
+
+
+def decimal_to_float(obj):
+    """The recursive Decimal walk the legacy path applied to every row"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    elif isinstance(obj, dict):
+        return {k: decimal_to_float(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [decimal_to_float(item) for item in obj]
+    return obj
+
+
+async def legacy_summary(pool: asyncpg.Pool, user_id: str):
+    """The pre-pool implementation: three sequential SELECT * plus a recursive Decimal walk"""
+    conn = await asyncpg.connect(BENCH_DB_URL)
+    try:
+        glucose_data = await conn.fetch(
+            "SELECT * FROM glucose_reading WHERE user_id = $1 ORDER BY timestamp DESC LIMIT 10", user_id
+        )
+        mood_data = await conn.fetch(
+            "SELECT * FROM mood_entry WHERE user_id = $1 ORDER BY date DESC LIMIT 7", user_id
+        )
+        meal_data = await conn.fetch(
+            "SELECT * FROM meal_entry WHERE user_id = $1 ORDER BY date DESC LIMIT 20", user_id
+        )
+        return {
+            'glucose_readings': [decimal_to_float(dict(row)) for row in glucose_data],
+            'mood_entries': [decimal_to_float(dict(row)) for row in mood_data],
+            'recent_meals': [decimal_to_float(dict(row)) for row in meal_data],
+            'summary_generated_at': datetime.now().isoformat()
+        }
+    finally:
+        await conn.close()
+
+
+async def pooled_three_queries(pool: asyncpg.Pool, user_id: str):
+    """Three sequential queries on a pooled connection (isolates the round-trip saving)"""
+    async with pool.acquire() as conn:
+        await conn.fetch("SELECT * FROM glucose_reading WHERE user_id = $1 ORDER BY timestamp DESC LIMIT 10", user_id)
+        await conn.fetch("SELECT * FROM mood_entry WHERE user_id = $1 ORDER BY date DESC LIMIT 7", user_id)
+        await conn.fetch("SELECT * FROM meal_entry WHERE user_id = $1 ORDER BY date DESC LIMIT 20", user_id)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000, help="rows per table for the benchmark user")
+    parser.add_argument("--iterations", type=int, default=300)
+    args = parser.parse_args()
+
+    manager = HealthDataManager(BENCH_DB_URL)
+    pool = await manager.connect()
+    async with pool.acquire() as conn:
+        user_id = await create_user(conn)
+        await seed_user(conn, user_id, glucose=args.rows, moods=args.rows, meals=args.rows)
+    try:
+        results = {}
+        for name, fn in [
+            ('legacy_connect_per_call', lambda u: legacy_summary(pool, u)),
+            ('pooled_three_queries', lambda u: pooled_three_queries(pool, u)),
+            ('single_round_trip', manager.get_user_health_summary),
+        ]:
+            await time_calls(fn, 10, user_id)  # warm up statement caches
+            results[name] = summarize(await time_calls(fn, args.iterations, user_id))
+        print(json.dumps({'rows_per_table': args.rows, 'results': results}, indent=2))
+    finally:
+        async with pool.acquire() as conn:
+            await drop_user(conn, user_id)
+        await manager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,144 @@
+"""Requests/sec through UserIdMiddleware with logging off, the queued JSON logger, and the old prints.
+
+Requests are fed straight into the ASGI app (no HTTP client or socket) and
+hit a trivial route, so the middleware and its logging are the only
+per-request work. Log
+output goes to `--sink`. The default is a pipe into a `cat` child process,
+which is how container runtimes collect stdout. `--sink slow` uses a reader
+that falls behind, so the pipe fills up. The old prints then block the event
+loop, while the queued logger drops records instead.
+
+Usage (from the agents directory):
+    uv run python benchmarks/bench_logging.py --requests 20000 --concurrency 100
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+import common  # noqa: F401  (puts the agents directory on sys.path)
+import logs
+from agent import UserIdMiddleware, current_user_id
+
+
+class LegacyPrintMiddleware(BaseHTTPMiddleware):
+    """The previous middleware: six synchronous prints per request"""
+
+    async def dispatch(self, request, call_next):
+        user_id = request.headers.get("X-User-Id", "default-user-id")
+        user_name = request.headers.get("X-User-Name", "User")
+        print(f"\n{'='*60}")
+        print(f"[MIDDLEWARE] Request received")
+        print(f"[MIDDLEWARE] User ID from header: {user_id}")
+        print(f"[MIDDLEWARE] User Name from header: {user_name}")
+        print(f"{'='*60}\n")
+        token = current_user_id.set(user_id)
+        try:
+            return await call_next(request)
+        finally:
+            current_user_id.reset(token)
+
+
+async def ping(request):
+    return PlainTextResponse("ok")
+
+
+def build_app(middleware):
+    app = Starlette(routes=[Route("/ping", ping), Route("/health", ping)])
+    app.add_middleware(middleware)
+    return app
+
+
+async def run(app, requests: int, concurrency: int, path: str, rounds: int = 3) -> float:
+    """Median requests/sec over `rounds` runs (after one warm-up round)"""
+    rates = sorted([await _run_once(app, requests, concurrency, path) for _ in range(rounds + 1)][1:])
+    return rates[len(rates) // 2]
+
+
+async def _run_once(app, requests: int, concurrency: int, path: str) -> float:
+    # Call the ASGI app directly; an HTTP client would dominate the per-request cost
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": [(b"host", b"bench"), (b"x-user-id", b"bench-user")],
+        "client": ("127.0.0.1", 1234), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            await app(dict(scope), receive, send)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return round(requests / (time.perf_counter() - started))
+
+
+def open_sink(kind: str):
+    if kind == "stdout":
+        return sys.stdout, None
+    if kind == "devnull":
+        return open(os.devnull, "w"), None
+    # "slow" models a log shipper that falls behind: about 80 KB/s
+    command = ["cat"] if kind == "pipe" else [
+        sys.executable, "-c", "import sys, time\nwhile sys.stdin.buffer.read1(4096): time.sleep(0.05)"
+    ]
+    consumer = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL)
+    return io.TextIOWrapper(consumer.stdin, line_buffering=True), consumer
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--sink", choices=["pipe", "slow", "devnull", "stdout"], default="pipe")
+    args = parser.parse_args()
+
+    sink, consumer = open_sink(args.sink)
+    results = {}
+    try:
+        logs.setup_logging({'user_id': current_user_id}, level="OFF")
+        results["logging_off"] = await run(build_app(UserIdMiddleware), args.requests, args.concurrency, "/ping")
+
+        logs.setup_logging({'user_id': current_user_id}, stream=sink, level="INFO", route_rates="/health=0")
+        results["json_queue"] = await run(build_app(UserIdMiddleware), args.requests, args.concurrency, "/ping")
+        results["json_queue_health_excluded"] = await run(
+            build_app(UserIdMiddleware), args.requests, args.concurrency, "/health"
+        )
+        logs.setup_logging({'user_id': current_user_id}, stream=sink, level="INFO", route_rates="/ping=0.1")
+        results["json_queue_sampled_10pct"] = await run(
+            build_app(UserIdMiddleware), args.requests, args.concurrency, "/ping"
+        )
+        results["queue_stats"] = logs.logging_stats()
+        logs.shutdown_logging()
+
+        with redirect_stdout(sink):
+            results["legacy_print"] = await run(
+                build_app(LegacyPrintMiddleware), args.requests, args.concurrency, "/ping"
+            )
+    finally:
+        if consumer is not None:
+            sink.close()
+            consumer.wait()
+    print(json.dumps({"requests_per_sec": results, **vars(args)}, indent=2), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+"""get_meal_plan_suggestions: catalog selection time and the database reads behind it.
+
+Plan selection (one day and a week) is timed on its own. The reads are
+timed separately: the latest-status row plus the 30-day intake from the
+daily buckets, against the uncached full health summary the tool used to
+fetch just to read the latest glucose status.
+
+Usage (from the agents directory, against a scratch database):
+    uv run python benchmarks/bench_meal_plan.py --rows 50000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from common import BENCH_DB_URL, create_user, drop_user, seed_user, summarize, time_calls
+import meal_plans
+import agent
+
+
+def time_plans(catalog, preference: str, days: int, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        catalog.plan(preference, days, 1800, 200, 'medium')
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000, help="glucose rows for the user (meals/moods: a fifth)")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    catalog = meal_plans.MealCatalog.load()
+    results = {'catalog_meals': len(catalog), 'catalog_load_ms': round((time.perf_counter() - started) * 1000, 3)}
+    for preference in ('balanced', 'low-carb'):
+        for days in (1, 7):
+            results[f'plan_{preference}_{days}d'] = time_plans(catalog, preference, days, args.iterations)
+
+    agent.health_db.db_url = BENCH_DB_URL
+    pool = await agent.health_db.connect()
+    async with pool.acquire() as conn:
+        user_id = await create_user(conn)
+        await seed_user(conn, user_id, glucose=args.rows, moods=args.rows // 5, meals=args.rows // 5, days=365)
+    try:
+        iterations = min(args.iterations, 500)
+        results['get_meal_plan_inputs'] = summarize(
+            await time_calls(agent.health_db.get_meal_plan_inputs, iterations, user_id))
+        results['full_summary_uncached'] = summarize(
+            await time_calls(agent.health_db._fetch_user_health_summary, iterations, user_id))
+        print(json.dumps({**results, **vars(args)}, indent=2))
+    finally:
+        async with pool.acquire() as conn:
+            await drop_user(conn, user_id)
+        await agent.health_db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
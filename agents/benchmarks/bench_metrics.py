@@ -0,0 +1,114 @@
+"""Cost of the in-process metrics: per observation, per request, and per /metrics scrape.
+
+Requests go straight into the ASGI app through UserIdMiddleware (logging
+off), as in bench_logging.py. They are timed once with the middleware's
+metric updates replaced by no-ops and once with them recorded. The
+registry is then filled to about the series count of a busy instance (every
+route, tool and HealthDataManager method seen, several statuses) and
+rendered repeatedly. Last, /metrics is scraped every `--scrape-ms` while
+the request load runs, to show that scrapes neither stall the load nor slow
+down under it.
+
+Usage (from the agents directory):
+    uv run python benchmarks/bench_metrics.py --requests 20000 --concurrency 100
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import timeit
+
+from bench_logging import build_app, run
+from common import summarize
+import logs
+import metrics
+from agent import UserIdMiddleware, app as agent_app, current_user_id
+
+ROUTES = [getattr(route, "path", None) for route in agent_app.router.routes if getattr(route, "path", None)]
+TOOLS = ['store_mood_data', 'store_glucose_data', 'store_glucose_batch', 'lookup_nutrition', 'store_meal_data',
+         'get_health_insights', 'get_trend_details', 'get_meal_plan_suggestions']
+DB_METHODS = ['store_mood_entry', 'store_glucose_reading', 'store_glucose_readings_bulk', 'store_meal_entry',
+              'get_rolling_averages', 'get_trend_analytics', 'get_meal_plan_inputs', 'get_user_health_summary',
+              '_fetch_user_health_summary']
+
+
+def fill_registry(samples: int = 200):
+    rng = random.Random(0)
+    for route in ROUTES:
+        for status in (200, 404, 500):
+            metrics.HTTP_REQUESTS.inc('GET', route, status, amount=samples)
+        for _ in range(samples):
+            metrics.HTTP_SECONDS.observe(rng.expovariate(20), 'GET', route)
+    for name in TOOLS:
+        for outcome in ('ok', 'error', 'timeout'):
+            metrics.TOOL_CALLS.inc(name, outcome, amount=samples)
+        for _ in range(samples):
+            metrics.TOOL_SECONDS.observe(rng.expovariate(50), name)
+    for name in DB_METHODS:
+        for _ in range(samples):
+            metrics.DB_SECONDS.observe(rng.expovariate(200), name)
+    for path in ('fast_path', 'model'):
+        for _ in range(samples):
+            metrics.AGUI_STREAM_SECONDS.observe(rng.expovariate(0.5), path)
+            metrics.AGUI_FIRST_TOKEN_SECONDS.observe(rng.expovariate(1), path)
+            metrics.MODEL_SECONDS.observe(rng.expovariate(0.5), 'gemini-2.5-flash')
+
+
+async def scrape_during_load(app, requests: int, concurrency: int, interval: float):
+    samples, done = [], asyncio.Event()
+
+    async def scraper():
+        while not done.is_set():
+            started = time.perf_counter()
+            metrics.render()
+            samples.append(time.perf_counter() - started)
+            await asyncio.sleep(interval)
+
+    task = asyncio.create_task(scraper())
+    try:
+        rate = await run(app, requests, concurrency, "/ping")
+    finally:
+        done.set()
+        await task
+    return rate, summarize(samples)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--scrape-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    logs.setup_logging({'user_id': current_user_id}, level="OFF")
+    results = {
+        'observe_ns': round(timeit.timeit(lambda: metrics.HTTP_SECONDS.observe(0.012, 'GET', '/ping'),
+                                          number=200_000) / 200_000 * 1e9),
+        'inc_ns': round(timeit.timeit(lambda: metrics.HTTP_REQUESTS.inc('GET', '/ping', 200),
+                                      number=200_000) / 200_000 * 1e9),
+    }
+
+    app = build_app(UserIdMiddleware)
+    inc, observe = metrics.HTTP_REQUESTS.inc, metrics.HTTP_SECONDS.observe
+    metrics.HTTP_REQUESTS.inc = metrics.HTTP_SECONDS.observe = lambda *args, **kwargs: None
+    try:
+        results['requests_per_sec_without_metrics'] = await run(app, args.requests, args.concurrency, "/ping")
+    finally:
+        metrics.HTTP_REQUESTS.inc, metrics.HTTP_SECONDS.observe = inc, observe
+    results['requests_per_sec_with_metrics'] = await run(app, args.requests, args.concurrency, "/ping")
+
+    fill_registry()
+    body = metrics.render()
+    results['scrape'] = {
+        'lines': body.count('\n'),
+        'bytes': len(body),
+        'render': summarize([timeit.timeit(metrics.render, number=1) for _ in range(200)]),
+    }
+    rate, scrapes = await scrape_during_load(app, args.requests, args.concurrency, args.scrape_ms / 1000)
+    results['under_load'] = {'requests_per_sec': rate, 'render': scrapes}
+    print(json.dumps({**results, **vars(args)}, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+"""Hit rate and latency of lookup_nutrition for a user who repeats meals.
+
+A user is seeded with `--meals` meal_entry rows drawn from the usual
+benchmark meal names. A stream of meal descriptions is then looked up:
+mostly those names written the way people type them (case, "w/", plurals,
+"for lunch"), plus shared reference meals and meals never seen before.
+It reports the hit rate per source, the first (history-loading) lookup
+and the per-lookup latency once the user's index is hot.
+
+Usage (from the agents directory, against a scratch database):
+    uv run python benchmarks/bench_nutrition.py --meals 2000 --lookups 5000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from common import BENCH_DB_URL, MEAL_NAMES, create_user, drop_user, seed_user, summarize
+import nutrition
+import agent
+
+NOVEL = ['Ramen', 'Pad thai', 'Falafel wrap', 'Pho', 'Fish tacos', 'Shakshuka', 'Poke bowl', 'Quinoa salad']
+
+
+def variant(name: str, rng: random.Random) -> str:
+    text = rng.choice([name, name.lower(), name.upper()])
+    if rng.random() < 0.3:
+        text = text.replace('with', 'w/').replace('WITH', 'W/')
+    if rng.random() < 0.3:
+        text += rng.choice([' for lunch', ' for breakfast', 's', '!'])
+    return text
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--meals", type=int, default=2000, help="meal_entry rows in the user's history")
+    parser.add_argument("--lookups", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    reference = [meal[0] for meal in nutrition.SEED_MEALS]
+    workload = [
+        variant(rng.choice(MEAL_NAMES), rng) if draw < 0.7
+        else variant(rng.choice(reference), rng) if draw < 0.85
+        else rng.choice(NOVEL)
+        for draw in (rng.random() for _ in range(args.lookups))
+    ]
+
+    agent.health_db.db_url = BENCH_DB_URL
+    pool = await agent.health_db.connect()
+    async with pool.acquire() as conn:
+        await nutrition.install(conn)
+        user_id = await create_user(conn)
+        await seed_user(conn, user_id, meals=args.meals, days=180)
+    lookup = agent.health_db.nutrition
+    try:
+        started = time.perf_counter()
+        await lookup.lookup(user_id, workload[0])
+        first = time.perf_counter() - started
+        samples = []
+        for text in workload[1:]:
+            started = time.perf_counter()
+            await lookup.lookup(user_id, text)
+            samples.append(time.perf_counter() - started)
+        stats = lookup.stats()
+        print(json.dumps({
+            'hit_rate': stats['hit_rate'],
+            'history_hits': stats['history_hits'],
+            'reference_hits': stats['reference_hits'],
+            'misses': stats['misses'],
+            'first_lookup_ms': round(first * 1000, 3),
+            'hot_lookup': summarize(samples),
+            **vars(args),
+        }, indent=2))
+    finally:
+        async with pool.acquire() as conn:
+            await drop_user(conn, user_id)
+        await agent.health_db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,196 @@
+"""Per-turn prompt size and agno session load/save time over a long conversation, unbounded vs bounded.
+
+The benchmark plays an AG-UI client through /agui in-process, with the stub
+model from stub_gemini.py. Like the real frontend, the client resends the
+whole thread every turn, including the assistant messages, tool calls and
+tool results it was streamed. It runs `--turns` model-path turns twice, each
+time in a fresh session:
+
+- unbounded: AGENT_HISTORY_TURNS=0, no health memory and no run trimming on save,
+  as before;
+- bounded: the configured window, compaction, health memory and
+  SESSION_KEEP_RUNS.
+
+For each checkpoint turn, the report gives:
+- the prompt size of the turn's first model call (estimated tokens: text,
+  call arguments, tool results and the system instruction);
+- the messages sent;
+- agno's get_session and upsert_session times;
+- the stored `runs` size.
+
+Finally the unbounded session is pruned to SESSION_KEEP_RUNS runs, as the
+periodic pass does for rows written before trimming on save, and get_session
+is timed before and after.
+
+The session store must be reachable. On a SQL_ASCII scratch database,
+psycopg returns bytes unless PGCLIENTENCODING=UTF8, so the script sets it.
+
+Usage (from the agents directory, against a scratch database):
+    uv run python benchmarks/bench_session_history.py --turns 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+os.environ.setdefault("PGCLIENTENCODING", "UTF8")
+os.environ.setdefault("AGNO_TELEMETRY", "false")
+
+import asyncpg
+import httpx
+
+from common import BENCH_DB_URL, create_user, drop_user, seed_user
+from stub_gemini import SCENARIOS, StubGeminiClient
+import agent
+import session_history
+
+CYCLE = ['log_meal', 'mood_and_glucose', 'insights', 'chat', 'meal_plan']
+CHECKPOINTS = (1, 10, 25, 50, 100, 200)
+
+
+class Timed:
+    """Wraps a method of the session store and records each call's duration"""
+
+    def __init__(self, target, name: str):
+        self.samples = []
+        original = getattr(target, name)
+
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.samples.append(time.perf_counter() - started)
+
+        setattr(target, name, wrapper)
+
+
+def apply_events(history, text: str):
+    """Append what the client was streamed to its copy of the thread, as CopilotKit does"""
+    calls, message, content = {}, None, []
+    for line in text.splitlines():
+        if not line.startswith('data: '):
+            continue
+        event = json.loads(line[6:])
+        kind = event['type']
+        if kind == 'TEXT_MESSAGE_START':
+            message, content = event['messageId'], []
+        elif kind == 'TEXT_MESSAGE_CONTENT':
+            content.append(event['delta'])
+        elif kind == 'TEXT_MESSAGE_END':
+            history.append({'id': message, 'role': 'assistant', 'content': ''.join(content)})
+        elif kind == 'TOOL_CALL_START':
+            calls[event['toolCallId']] = {'name': event['toolCallName'], 'arguments': []}
+        elif kind == 'TOOL_CALL_ARGS':
+            calls[event['toolCallId']]['arguments'].append(event['delta'])
+        elif kind == 'TOOL_CALL_END':
+            call = calls[event['toolCallId']]
+            history.append({'id': f"call-{event['toolCallId']}", 'role': 'assistant', 'toolCalls': [{
+                'id': event['toolCallId'], 'type': 'function',
+                'function': {'name': call['name'], 'arguments': ''.join(call['arguments'])},
+            }]})
+        elif kind == 'TOOL_CALL_RESULT':
+            history.append({'id': event['messageId'], 'role': 'tool', 'content': event['content'],
+                            'toolCallId': event['toolCallId']})
+
+
+async def converse(client, conn, stub, get_timer, save_timer, user_id: str, thread_id: str, turns: int):
+    history, per_turn = [], []
+    for turn in range(turns):
+        history.append({'id': f'{thread_id}-u{turn}', 'role': 'user', 'content': SCENARIOS[CYCLE[turn % len(CYCLE)]][0]})
+        calls, gets, saves = len(stub.prompt_tokens), len(get_timer.samples), len(save_timer.samples)
+        body = {'threadId': thread_id, 'runId': f'{thread_id}-{turn}', 'state': {}, 'tools': [], 'context': [],
+                'forwardedProps': {}, 'messages': history}
+        sent = len(history)
+        response = await client.post('/agui', json=body, headers={'X-User-Id': user_id})
+        if 'RUN_FINISHED' not in response.text:
+            raise RuntimeError(f'turn {turn} failed: {response.text[-300:]}')
+        apply_events(history, response.text)
+        runs_bytes = await conn.fetchval(
+            f"SELECT pg_column_size(runs) FROM {session_history.SESSION_TABLE} WHERE session_id = $1", thread_id)
+        per_turn.append({
+            'prompt_tokens': stub.prompt_tokens[calls] if len(stub.prompt_tokens) > calls else None,
+            'messages_sent': sent,
+            'get_session_ms': round(sum(get_timer.samples[gets:]) * 1000, 2),
+            'upsert_session_ms': round(sum(save_timer.samples[saves:]) * 1000, 2),
+            'runs_bytes': runs_bytes,
+        })
+    return per_turn
+
+
+def checkpoints(per_turn):
+    return {turn: per_turn[turn - 1] for turn in CHECKPOINTS if turn <= len(per_turn)}
+
+
+def time_get_session(session_db, thread_id: str, repeat: int = 20) -> float:
+    from agno.db.base import SessionType
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        session_db.get_session(session_id=thread_id, session_type=SessionType.AGENT)
+        samples.append(time.perf_counter() - started)
+    return round(statistics.median(samples) * 1000, 2)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=50)
+    args = parser.parse_args()
+
+    bounded = {
+        'AGENT_HISTORY_TURNS': agent.AGENT_HISTORY_TURNS,
+        'AGENT_HISTORY_COMPACT_CHARS': agent.AGENT_HISTORY_COMPACT_CHARS,
+        'AGENT_HEALTH_MEMORY': agent.AGENT_HEALTH_MEMORY,
+        'SESSION_KEEP_RUNS': agent.SESSION_KEEP_RUNS,
+    }
+    unbounded = {'AGENT_HISTORY_TURNS': 0, 'AGENT_HISTORY_COMPACT_CHARS': 0, 'AGENT_HEALTH_MEMORY': False,
+                 'SESSION_KEEP_RUNS': 0}
+
+    stub = StubGeminiClient(first_token_ms=0, token_ms=0)
+    agent.agent_runtime.model_client = stub
+    await agent.health_db.connect()
+    agent.agent_runtime.start(agent.app)
+    session_db = (await agent.agent_runtime.get()).db
+    get_timer, save_timer = Timed(session_db, 'get_session'), Timed(session_db, 'upsert_session')
+
+    conn = await asyncpg.connect(BENCH_DB_URL)
+    user_id = await create_user(conn)
+    await seed_user(conn, user_id, glucose=500, moods=30, meals=60, days=30)
+    threads, results = [], {}
+    try:
+        transport = httpx.ASGITransport(app=agent.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=60) as client:
+            for mode, settings in (('unbounded', unbounded), ('bounded', bounded)):
+                for name, value in settings.items():
+                    setattr(agent, name, value)
+                session_db.keep_runs = settings['SESSION_KEEP_RUNS']
+                thread_id = f'bench-history-{mode}-{user_id}'
+                threads.append(thread_id)
+                per_turn = await converse(client, conn, stub, get_timer, save_timer, user_id, thread_id, args.turns)
+                results[mode] = {'settings': settings, 'by_turn': checkpoints(per_turn)}
+
+        thread_id = threads[0]
+        before = time_get_session(session_db, thread_id)
+        before_bytes = await conn.fetchval(
+            f"SELECT pg_column_size(runs) FROM {session_history.SESSION_TABLE} WHERE session_id = $1", thread_id)
+        pruned = await session_history.prune(conn, bounded['SESSION_KEEP_RUNS'], archive_days=0)
+        results['prune'] = {
+            'keep_runs': bounded['SESSION_KEEP_RUNS'],
+            'sessions_trimmed': pruned['trimmed'],
+            'runs_bytes': {'before': before_bytes, 'after': await conn.fetchval(
+                f"SELECT pg_column_size(runs) FROM {session_history.SESSION_TABLE} WHERE session_id = $1", thread_id)},
+            'get_session_ms': {'before': before, 'after': time_get_session(session_db, thread_id)},
+        }
+    finally:
+        if await session_history.table_exists(conn):
+            await conn.execute(f"DELETE FROM {session_history.SESSION_TABLE} WHERE session_id = ANY($1::text[])", threads)
+        await drop_user(conn, user_id)
+        await conn.close()
+        await agent.health_db.close()
+    print(json.dumps({**results, **vars(args)}, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,142 @@
+"""Time-to-first-event and streaming throughput: pure ASGI UserIdMiddleware vs the BaseHTTPMiddleware version.
+
+A stand-in for the AG-UI endpoint streams `--events` server-sent event
+frames per request, yielding to the event loop between frames the way a
+model stream does. `--streams` requests run concurrently. Each one is fed
+straight into the ASGI app and timed until its first non-empty body chunk
+and until the end of the stream.
+
+Usage (from the agents directory):
+    uv run python benchmarks/bench_streaming.py --streams 200 --events 500
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+import uuid
+
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import StreamingResponse
+from starlette.routing import Route
+
+from common import summarize
+import logs
+from agent import UserIdMiddleware, current_user_id, logger
+
+FRAME = 'data: {"type":"TEXT_MESSAGE_CONTENT","messageId":"m1","delta":"%s"}\n\n'
+
+
+class BaseHTTPUserIdMiddleware(BaseHTTPMiddleware):
+    """The previous UserIdMiddleware (BaseHTTPMiddleware with request logging)"""
+
+    async def dispatch(self, request, call_next):
+        user_id = request.headers.get("X-User-Id", "default-user-id")
+        rid = request.headers.get("X-Request-Id") or uuid.uuid4().hex[:16]
+        tokens = (
+            (current_user_id, current_user_id.set(user_id)),
+            (logs.request_id, logs.request_id.set(rid)),
+            (logs.request_route, logs.request_route.set(request.url.path)),
+        )
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            response.headers["X-Request-Id"] = rid
+            return response
+        finally:
+            logger.info("request", extra={
+                'method': request.method, 'status': status,
+                'duration_ms': round((time.perf_counter() - started) * 1000, 1)
+            })
+            for var, token in reversed(tokens):
+                var.reset(token)
+
+
+def build_app(middleware, events: int):
+    async def agui(request):
+        user_id = current_user_id.get()
+
+        async def frames():
+            for i in range(events):
+                await asyncio.sleep(0)
+                yield FRAME % f"{user_id}:{i}"
+
+        return StreamingResponse(frames(), media_type="text/event-stream")
+
+    app = Starlette(routes=[Route("/agui", agui, methods=["POST"])])
+    app.add_middleware(middleware)
+    return app
+
+
+async def stream_once(app, n: int):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/agui", "raw_path": b"/agui", "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"bench"), (b"x-user-id", f"user-{n}".encode())],
+        "client": ("127.0.0.1", 1234), "server": ("bench", 80),
+    }
+    done = asyncio.Event()
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": b"{}", "more_body": False}
+        # Disconnect only once the response is complete
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    started = time.perf_counter()
+    first = None
+    received = 0
+
+    async def send(message):
+        nonlocal first, received
+        if message["type"] == "http.response.body" and message.get("body"):
+            if first is None:
+                first = time.perf_counter() - started
+            received += len(message["body"])
+
+    await app(scope, receive, send)
+    done.set()
+    return first, time.perf_counter() - started, received
+
+
+async def run(app, streams: int):
+    started = time.perf_counter()
+    results = await asyncio.gather(*(stream_once(app, n) for n in range(streams)))
+    elapsed = time.perf_counter() - started
+    return {
+        'time_to_first_event': summarize([first for first, _, _ in results]),
+        'stream_duration': summarize([total for _, total, _ in results]),
+        'mb_per_sec': round(sum(size for _, _, size in results) / elapsed / 1e6, 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=200, help="concurrent streaming requests")
+    parser.add_argument("--events", type=int, default=500, help="event frames per stream")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    logs.setup_logging({'user_id': current_user_id}, level="OFF")
+    results = {}
+    for name, middleware in (('base_http_middleware', BaseHTTPUserIdMiddleware), ('pure_asgi', UserIdMiddleware)):
+        app = build_app(middleware, args.events)
+        await run(app, args.streams)  # warm-up
+        rounds = [await run(app, args.streams) for _ in range(args.rounds)]
+        # Keep the median round by throughput
+        results[name] = sorted(rounds, key=lambda r: r['mb_per_sec'])[len(rounds) // 2]
+        results[name]['events_per_sec'] = round(
+            results[name]['mb_per_sec'] * 1e6 / len(FRAME % "user-0:0")
+        )
+    print(json.dumps({**results, **vars(args)}, indent=2), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
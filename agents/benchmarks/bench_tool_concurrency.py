@@ -0,0 +1,120 @@
+"""One model turn's tool calls through agno's dispatcher: one at a time vs all together, and a slow call timing out.
+
+One turn logs a meal, a glucose reading and a mood, and looks up a meal's
+nutrition. Another logs two of those, then asks for insights and a meal
+plan. The calls go through agno's Model.arun_function_calls, the same path
+as a live run, without calling the model itself. Each turn is timed twice:
+with the calls issued one per dispatch, and with all of them in a single
+dispatch, which agno gathers. A final turn adds a `pg_sleep` tool past its
+budget, to show that it times out alone while the rest complete.
+
+Usage (from the agents directory, against a scratch database):
+    uv run python benchmarks/bench_tool_concurrency.py --rows 50000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from agno.models.google import Gemini
+from agno.tools.function import Function, FunctionCall
+
+from common import BENCH_DB_URL, create_user, drop_user, seed_user, summarize
+import agent
+import logs
+
+LOGGING_TURN = [
+    ('store_meal_data', {'meal_type': 'lunch', 'meal_name': 'Turkey sandwich', 'calories': 350, 'carbs': 40,
+                         'protein': 25, 'fat': 10, 'fiber': 3, 'glycemic_impact': 'medium'}),
+    ('store_glucose_data', {'glucose_value': 156}),
+    ('store_mood_data', {'mood': 'good', 'energy': 6, 'stress': 4}),
+    ('lookup_nutrition', {'meal_name': 'oatmeal with berries'}),
+]
+TURN = LOGGING_TURN[:2] + [
+    ('get_health_insights', {}),
+    ('get_meal_plan_suggestions', {'dietary_preferences': 'balanced', 'days': 7}),
+]
+
+
+@agent.tool_budget
+async def slow_query(seconds: float) -> str:
+    """Stand-in for a tool stuck on a slow database call"""
+    async with agent.health_db.get_connection() as conn:
+        await conn.execute("SELECT pg_sleep($1)", seconds)
+    return '{"status":"success"}'
+
+
+def calls(functions, turn):
+    return [FunctionCall(function=functions[name], arguments=dict(arguments)) for name, arguments in turn]
+
+
+async def dispatch(model, function_calls):
+    results = []
+    async for _ in model.arun_function_calls(function_calls=function_calls, function_call_results=results):
+        pass
+    return results
+
+
+async def time_turns(model, functions, turn, iterations: int, together: bool):
+    samples = []
+    for _ in range(iterations):
+        agent.health_db.summary_cache.clear()
+        started = time.perf_counter()
+        if together:
+            await dispatch(model, calls(functions, turn))
+        else:
+            for function_call in calls(functions, turn):
+                await dispatch(model, [function_call])
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000, help="glucose rows for the user (meals/moods: a fifth)")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--slow-seconds", type=float, default=3.0)
+    parser.add_argument("--slow-budget-ms", type=float, default=500)
+    args = parser.parse_args()
+
+    logs.setup_logging({'user_id': agent.current_user_id}, level="OFF")
+    model = Gemini(id="gemini-2.5-flash")
+    tools = agent.AGENT_TOOLS + [slow_query]
+    functions = {}
+    for tool in tools:
+        function = Function.from_callable(tool)
+        functions[function.name] = function
+
+    agent.health_db.db_url = BENCH_DB_URL
+    pool = await agent.health_db.connect()
+    async with pool.acquire() as conn:
+        user_id = await create_user(conn)
+        await seed_user(conn, user_id, glucose=args.rows, moods=args.rows // 5, meals=args.rows // 5, days=90)
+    agent.current_user_id.set(user_id)
+    try:
+        await time_turns(model, functions, TURN, 3, together=True)  # warm-up
+        results = {}
+        for name, turn in (('logging_turn', LOGGING_TURN), ('insights_turn', TURN)):
+            results[name] = {
+                'one_per_dispatch': await time_turns(model, functions, turn, args.iterations, together=False),
+                'single_dispatch': await time_turns(model, functions, turn, args.iterations, together=True),
+            }
+
+        agent.tool_budget.timeouts_ms['slow_query'] = args.slow_budget_ms
+        slow_turn = TURN + [('slow_query', {'seconds': args.slow_seconds})]
+        started = time.perf_counter()
+        outputs = await dispatch(model, calls(functions, slow_turn))
+        results['with_slow_tool'] = {
+            'turn_ms': round((time.perf_counter() - started) * 1000, 1),
+            'results': {message.tool_name: json.loads(message.content).get('error', 'ok') for message in outputs},
+        }
+        results['tool_stats'] = agent.tool_budget.stats()
+        print(json.dumps({**results, **vars(args)}, indent=2))
+    finally:
+        async with pool.acquire() as conn:
+            await drop_user(conn, user_id)
+        await agent.health_db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""Bytes and tokens per tool call: the old indent=2 JSON vs compact serialization.dumps.
+
+Runs every tool once for a seeded user. The compact output is compared with
+the same payload re-encoded the old way, as json.dumps(indent=2) after a
+recursive Decimal walk. Both encoders are timed on that payload. Tokens
+come from Gemini's count_tokens when GOOGLE_API_KEY is set; otherwise they
+are estimated at 4 characters per token.
+
+Usage (from the agents directory, against a scratch database):
+    uv run python benchmarks/bench_tool_json.py
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from common import BENCH_DB_URL, create_user, drop_user, seed_user
+import serialization
+import agent
+from bench_health_summary import decimal_to_float
+
+
+def token_counter():
+    if not os.getenv("GOOGLE_API_KEY"):
+        return "estimate (chars / 4)", lambda text: round(len(text) / 4)
+    from google import genai
+    client = genai.Client()
+    return "gemini count_tokens", lambda text: client.models.count_tokens(
+        model="gemini-2.5-flash", contents=text
+    ).total_tokens
+
+
+def per_call_us(fn, payload, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn(payload)
+    return round((time.perf_counter() - started) / iterations * 1e6, 1)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000, help="history rows per table for the user")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    agent.health_db.db_url = BENCH_DB_URL
+    pool = await agent.health_db.connect()
+    async with pool.acquire() as conn:
+        user_id = await create_user(conn)
+        await seed_user(conn, user_id, glucose=args.rows, moods=args.rows // 5, meals=args.rows // 5, days=120)
+    agent.current_user_id.set(user_id)
+    calls = {
+        'store_mood_data': lambda: agent.store_mood_data('good', 7, 4, 'felt fine after a walk'),
+        'store_glucose_data': lambda: agent.store_glucose_data(142),
+        'store_meal_data': lambda: agent.store_meal_data('lunch', 'Grilled chicken salad', 350, 15, 35, 18, 5, 'low'),
+        'get_health_insights': lambda: agent.get_health_insights(),
+        'get_meal_plan_suggestions': lambda: agent.get_meal_plan_suggestions('low-carb'),
+    }
+    method, count_tokens = token_counter()
+    results = {'encoder': serialization.ENCODER, 'tokens': method, 'tools': {}}
+    try:
+        for name, call in calls.items():
+            compact = await call()
+            payload = json.loads(compact)
+            old = json.dumps(decimal_to_float(payload), indent=2)
+            old_tokens, new_tokens = count_tokens(old), count_tokens(compact)
+            results['tools'][name] = {
+                'old_bytes': len(old.encode()),
+                'new_bytes': len(compact.encode()),
+                'bytes_saved_pct': round(100 * (1 - len(compact.encode()) / len(old.encode())), 1),
+                'old_tokens': old_tokens,
+                'new_tokens': new_tokens,
+                'tokens_saved': old_tokens - new_tokens,
+                'old_encode_us': per_call_us(lambda p: json.dumps(decimal_to_float(p), indent=2), payload,
+                                             args.iterations),
+                'new_encode_us': per_call_us(serialization.dumps, payload, args.iterations),
+            }
+        print(json.dumps(results, indent=2))
+    finally:
+        async with pool.acquire() as conn:
+            await drop_user(conn, user_id)
+        await agent.health_db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
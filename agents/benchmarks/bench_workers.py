@@ -0,0 +1,156 @@
+"""Throughput of the prod server (`python agent.py`) with 1, 2, 4... worker processes.
+
+For each WEB_CONCURRENCY value the server is started with ENV=prod. The
+benchmark waits until /metrics shows every worker's agent loaded (that
+load is CPU-bound and would otherwise overlap the run), then warms up. Client processes (one per
+--clients) drive fast-path /agui glucose messages for --duration seconds.
+The result for each worker count is requests/s and latency percentiles.
+
+After each run, /metrics is scraped once. agui_runs_total must equal the
+number of runs the clients completed, whichever worker answers the scrape;
+this checks the merged multi-worker metrics.
+
+Throughput can only scale up to the number of cores. The client processes
+and Postgres share those cores with the server, so on a small machine the
+curve flattens early. Compare runs on the same host, and see `cpu_count` in
+the output.
+
+Usage (from the agents directory, against a scratch database):
+    uv run python benchmarks/bench_workers.py --workers 1 2 4 --clients 4 --duration 15
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import asyncpg
+import httpx
+
+from bench_cold_start import free_port
+from common import BENCH_DB_URL, create_user, drop_user, summarize
+
+AGENTS_DIR = Path(__file__).resolve().parent.parent
+
+
+async def drive(port: int, user_id: str, concurrency: int, duration: float):
+    body = {'threadId': 't', 'runId': 'r', 'state': {}, 'tools': [], 'context': [], 'forwardedProps': {},
+            'messages': [{'id': 'm', 'role': 'user', 'content': 'glucose 123'}]}
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', timeout=30, limits=limits) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = await client.post('/agui', json=body, headers={'X-User-Id': user_id})
+                if response.status_code == 200 and 'RUN_FINISHED' in response.text:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors
+
+
+def client_process(port: int, user_id: str, concurrency: int, duration: float, results):
+    results.put(asyncio.run(drive(port, user_id, concurrency, duration)))
+
+
+def run_clients(port: int, user_id: str, clients: int, concurrency: int, duration: float):
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=client_process, args=(port, user_id, concurrency, duration, results))
+        for _ in range(clients)
+    ]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    latencies = [latency for batch, _ in collected for latency in batch]
+    return latencies, sum(errors for _, errors in collected)
+
+
+def metric_sum(metrics_text: str, name: str) -> float:
+    return sum(float(value) for value in re.findall(rf'^{name}(?:\{{[^}}]*\}})? (\S+)$', metrics_text, re.MULTILINE))
+
+
+def scrape(port: int, name: str) -> float:
+    return metric_sum(httpx.get(f'http://127.0.0.1:{port}/metrics', timeout=10).text, name)
+
+
+def bench_workers(workers: int, user_id: str, args):
+    port = free_port()
+    env = {**os.environ, 'ENV': 'prod', 'PORT': str(port), 'LOG_LEVEL': 'WARNING',
+           'WEB_CONCURRENCY': str(workers), 'METRICS_SNAPSHOT_INTERVAL': '1'}
+    env.pop('METRICS_MULTIPROC_DIR', None)
+    server = subprocess.Popen([sys.executable, 'agent.py'], cwd=AGENTS_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        started = time.perf_counter()
+        while True:
+            try:
+                if scrape(port, 'agent_loaded') >= workers:
+                    break
+            except httpx.TransportError:
+                pass
+            if time.perf_counter() - started > args.timeout:
+                raise RuntimeError(f'server with {workers} workers did not load')
+            time.sleep(0.2)
+        # Warm up every worker's pool and caches
+        run_clients(port, user_id, args.clients, args.concurrency, args.warmup)
+        time.sleep(1.5)  # one snapshot interval, so every worker's last runs are in the files
+        before = scrape(port, 'agui_runs_total')
+
+        latencies, errors = run_clients(port, user_id, args.clients, args.concurrency, args.duration)
+        time.sleep(1.5)  # one snapshot interval, so every worker's last runs are in the files
+        after = scrape(port, 'agui_runs_total')
+        return {
+            'requests_per_sec': round(len(latencies) / args.duration),
+            'errors': errors,
+            'latency': summarize(latencies),
+            'metrics_agui_runs': after - before,
+            'client_runs': len(latencies) + errors,
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=args.timeout)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=4, help="client processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight per client process")
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    conn = await asyncpg.connect(BENCH_DB_URL)
+    user_id = await create_user(conn)
+    try:
+        results = {str(workers): await asyncio.to_thread(bench_workers, workers, user_id, args)
+                   for workers in args.workers}
+    finally:
+        await drop_user(conn, user_id)
+        await conn.close()
+    base = results[str(args.workers[0])]['requests_per_sec'] or 1
+    print(json.dumps({
+        'cpu_count': os.cpu_count(),
+        'by_workers': results,
+        'speedup': {workers: round(result['requests_per_sec'] / base, 2) for workers, result in results.items()},
+        **vars(args),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""Glucose insert throughput with and without the write buffer at 1, 100 and 10k concurrent writers.
+
+Usage (from the agents directory, against a scratch database):
+    uv run python benchmarks/bench_write_buffer.py --writes 10000
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime
+
+from common import BENCH_DB_URL, create_user, drop_user, summarize
+from agent import HealthDataManager
+
+
+async def unbuffered_insert(manager: HealthDataManager, user_id: str, value: float):
+    """The previous path: one pooled INSERT ... RETURNING * per reading"""
+    async with manager.get_connection() as conn:
+        await conn.fetchrow(
+            "INSERT INTO glucose_reading (id, user_id, value, status, timestamp) "
+            "VALUES ($1, $2, $3, $4, $5) RETURNING *",
+            str(uuid.uuid4()), user_id, value, 'normal', datetime.now()
+        )
+
+
+async def buffered_insert(manager: HealthDataManager, user_id: str, value: float):
+    await manager.store_glucose_reading(user_id, value)
+
+
+async def run(insert, manager, user_id, writers: int, writes: int):
+    per_writer = max(1, writes // writers)
+    latencies = []
+    errors = []
+
+    async def writer(n):
+        for i in range(per_writer):
+            started = time.perf_counter()
+            try:
+                await insert(manager, user_id, 100.0 + (n + i) % 50)
+            except Exception as exc:
+                # e.g. pool acquire timeouts when writers far outnumber connections
+                errors.append(type(exc).__name__)
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(writer(n) for n in range(writers)))
+    elapsed = time.perf_counter() - started
+    return {
+        'writes': len(latencies),
+        'errors': len(errors),
+        'error_types': sorted(set(errors)),
+        'writes_per_sec': round(len(latencies) / elapsed),
+        **(summarize(latencies) if latencies else {})
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writes", type=int, default=10000, help="total writes per scenario")
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 100, 10000])
+    args = parser.parse_args()
+
+    manager = HealthDataManager(BENCH_DB_URL)
+    pool = await manager.connect()
+    async with pool.acquire() as conn:
+        user_id = await create_user(conn)
+    results = {}
+    try:
+        for writers in args.writers:
+            # A single sequential writer gets a smaller run; it is latency-bound
+            writes = args.writes if writers > 1 else min(args.writes, 2000)
+            results[f'{writers}_writers'] = {
+                'unbuffered': await run(unbuffered_insert, manager, user_id, writers, writes),
+                'buffered': await run(buffered_insert, manager, user_id, writers, writes),
+            }
+        results['buffer_stats'] = manager.writes.stats()
+        print(json.dumps(results, indent=2))
+    finally:
+        async with pool.acquire() as conn:
+            await drop_user(conn, user_id)
+        await manager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,191 @@
+"""Assert that every HealthDataManager read query uses an index at realistic table sizes.
+
+Seeds background users with set-based SQL (10M rows by default, split 60/20/20
+across glucose/mood/meals) plus one faker-seeded target user. It then EXPLAINs
+each registered query for the target user, under both custom and generic
+plans, and fails if any health table is read with anything but an index scan.
+Once the tables are partitioned (partitions.py), each scan is reported
+against its parent table, with the number of partitions the query actually
+read out of those in its plan. Sequential scans of empty partitions (the
+months ahead) cost nothing and are left out.
+The seed is reused when it already exists, so repeated runs only pay for it once.
+
+Usage (from the agents directory, against a scratch database):
+    uv run python migrations.py apply
+    uv run python benchmarks/explain_plans.py --rows 10000000
+"""
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import asyncpg
+
+from common import BENCH_DB_URL, create_user, seed_user
+import aggregates
+import analytics
+import nutrition
+import partitions
+from agent import ANALYTICS_MAX_POINTS, HEALTH_SUMMARY_QUERY, LATEST_GLUCOSE_STATUS_QUERY
+
+BACKGROUND_PREFIX = 'explain-bg-'
+TARGET_USER = 'explain-target'
+HEALTH_TABLES = {'glucose_reading', 'mood_entry', 'meal_entry', 'health_daily_aggregate'}
+INDEX_SCANS = {'Index Scan', 'Index Only Scan', 'Bitmap Heap Scan'}
+PARTITION = re.compile(rf"^({'|'.join(partitions.PARTITIONED_TABLES)})_(p\d{{4}}_\d{{2}}|before_\d{{4}}_\d{{2}}|after)$")
+
+
+def registered_queries():
+    """(name, sql, params) for every read path in HealthDataManager"""
+    return [
+        ('get_user_health_summary', HEALTH_SUMMARY_QUERY, [TARGET_USER]),
+        ('rolling_window', aggregates.ROLLING_WINDOW_SQL, [TARGET_USER, date.today() - timedelta(days=7)]),
+        ('daily_buckets', aggregates.DAILY_BUCKETS_SQL, [TARGET_USER, date.today() - timedelta(days=365)]),
+        ('get_trend_analytics', analytics.SERIES_SQL,
+         [TARGET_USER, datetime.now() - timedelta(days=max(analytics.WINDOWS)), ANALYTICS_MAX_POINTS]),
+        ('latest_glucose_status', LATEST_GLUCOSE_STATUS_QUERY, [TARGET_USER]),
+        ('daily_intake', aggregates.DAILY_INTAKE_SQL, [TARGET_USER, date.today() - timedelta(days=30)]),
+        ('lookup_nutrition', nutrition.HISTORY_SQL,
+         [TARGET_USER, datetime.now() - timedelta(days=nutrition.HISTORY_DAYS), nutrition.HISTORY_LIMIT]),
+    ]
+
+
+async def seed_background(conn: asyncpg.Connection, rows: int, users: int):
+    existing = await conn.fetchval(
+        "SELECT count(*) FROM glucose_reading WHERE user_id LIKE $1", BACKGROUND_PREFIX + '%'
+    )
+    glucose, other = int(rows * 0.6), int(rows * 0.2)
+    if existing >= glucose:
+        print(f"Reusing {existing} background glucose rows")
+        return
+    started = time.perf_counter()
+    await conn.execute("""
+        INSERT INTO "user" (id, name, email)
+        SELECT $1 || g, 'Background ' || g, $1 || g || '@bench.local' FROM generate_series(1, $2) g
+        ON CONFLICT (id) DO NOTHING
+    """, BACKGROUND_PREFIX, users)
+    # Bypass the aggregate triggers while bulk loading; buckets are rebuilt afterwards
+    for table in ('glucose_reading', 'mood_entry', 'meal_entry'):
+        await conn.execute(f'ALTER TABLE {table} DISABLE TRIGGER USER')
+    try:
+        await conn.execute("""
+            INSERT INTO glucose_reading (id, user_id, value, status, timestamp)
+            SELECT md5(random()::text || g), $1 || (1 + g % $2), v,
+                   CASE WHEN v < 80 THEN 'low' WHEN v > 180 THEN 'high' ELSE 'normal' END,
+                   now() - random() * interval '730 days'
+            FROM (SELECT g, round((60 + random() * 260)::numeric, 1)::real AS v
+                  FROM generate_series(1, $3) g) s
+        """, BACKGROUND_PREFIX, users, glucose)
+        await conn.execute("""
+            INSERT INTO mood_entry (id, user_id, mood, energy, stress, date)
+            SELECT md5(random()::text || g), $1 || (1 + g % $2),
+                   (ARRAY['great', 'good', 'okay', 'poor', 'terrible'])[1 + g % 5],
+                   1 + g % 10, 1 + (g / 7) % 10, now() - random() * interval '730 days'
+            FROM generate_series(1, $3) g
+        """, BACKGROUND_PREFIX, users, other)
+        await conn.execute("""
+            INSERT INTO meal_entry (id, user_id, type, name, calories, carbs, protein, fat, fiber,
+                                    glycemic_impact, date)
+            SELECT md5(random()::text || g), $1 || (1 + g % $2),
+                   (ARRAY['breakfast', 'lunch', 'dinner', 'snack'])[1 + g % 4], 'Meal ' || (g % 500),
+                   100 + g % 800, g % 90, g % 45, g % 35, g % 12,
+                   (ARRAY['low', 'medium', 'high'])[1 + g % 3], now() - random() * interval '730 days'
+            FROM generate_series(1, $3) g
+        """, BACKGROUND_PREFIX, users, other)
+    finally:
+        for table in ('glucose_reading', 'mood_entry', 'meal_entry'):
+            await conn.execute(f'ALTER TABLE {table} ENABLE TRIGGER USER')
+    await aggregates.rebuild(conn)
+    print(f"Seeded {glucose + 2 * other} background rows in {time.perf_counter() - started:.1f}s")
+
+
+def scans(plan):
+    """Yield (node type, relation, index, executed) for every scan node in an EXPLAIN JSON plan"""
+    if 'Relation Name' in plan:
+        index = plan.get('Index Name')
+        if index is None and plan['Node Type'] == 'Bitmap Heap Scan':
+            index = plan['Plans'][0].get('Index Name')
+        yield plan['Node Type'], plan['Relation Name'], index, plan.get('Actual Loops', 0) > 0
+    for child in plan.get('Plans', []):
+        yield from scans(child)
+
+
+def by_table(nodes):
+    """Group scan nodes on partitions under their parent: (node type, table, index, partitions read, planned)"""
+    grouped = {}
+    for node_type, relation, index, executed in nodes:
+        match = PARTITION.match(relation)
+        table = match[1] if match else relation
+        if match and index:
+            index = index.replace(relation, table, 1)
+        key = (node_type, table, index)
+        read, planned = grouped.get(key, (0, 0))
+        grouped[key] = (read + executed, planned + 1)
+    return [(*key, read, planned) for key, (read, planned) in grouped.items()]
+
+
+def literal(value) -> str:
+    """A quoted SQL literal; EXECUTE casts it to the prepared statement's parameter type"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+async def explain_prepared(conn: asyncpg.Connection, sql: str, params) -> dict:
+    """EXPLAIN ANALYZE the query as a prepared statement, so plan_cache_mode decides custom or generic
+
+    EXPLAIN with bound parameters would always plan for the values given.
+    EXECUTE takes literals, since utility statements accept no parameters.
+    """
+    await conn.execute(f"PREPARE explain_query AS {sql}")
+    try:
+        args = ', '.join(literal(param) for param in params)
+        return json.loads(await conn.fetchval(f"EXPLAIN (ANALYZE, FORMAT JSON) EXECUTE explain_query({args})"))[0]
+    finally:
+        await conn.execute("DEALLOCATE explain_query")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000, help="background rows across the three tables")
+    parser.add_argument("--users", type=int, default=10_000, help="background users")
+    parser.add_argument("--target-rows", type=int, default=50_000, help="faker rows per table for the target user")
+    args = parser.parse_args()
+
+    conn = await asyncpg.connect(BENCH_DB_URL)
+    try:
+        await seed_background(conn, args.rows, args.users)
+        if not await conn.fetchval("SELECT count(*) FROM glucose_reading WHERE user_id = $1", TARGET_USER):
+            await create_user(conn, TARGET_USER)
+            await seed_user(conn, TARGET_USER, glucose=args.target_rows, moods=args.target_rows // 5,
+                            meals=args.target_rows // 5, days=730)
+        await conn.execute('ANALYZE glucose_reading; ANALYZE mood_entry; ANALYZE meal_entry; '
+                           'ANALYZE health_daily_aggregate')
+
+        empty = {row['relname'] for row in await conn.fetch(
+            "SELECT relname FROM pg_class WHERE relkind = 'r' AND pg_relation_size(oid) = 0"
+        )}
+        failures = 0
+        # asyncpg runs prepared statements, which may switch to a generic plan
+        for plan_mode in ('force_custom_plan', 'force_generic_plan'):
+            await conn.execute(f"SET plan_cache_mode = {plan_mode}")
+            for name, sql, params in registered_queries():
+                plan = await explain_prepared(conn, sql, params)
+                nodes = [node for node in scans(plan['Plan'])
+                         if not (node[0] == 'Seq Scan' and node[1] in empty and PARTITION.match(node[1]))]
+                nodes = [node for node in by_table(nodes) if node[1] in HEALTH_TABLES]
+                bad = [node for node in nodes if node[0] not in INDEX_SCANS]
+                status = "FAIL" if bad or not nodes else "ok"
+                failures += status == "FAIL"
+                print(f"[{status}] {name} ({plan_mode}): {plan['Execution Time']:.3f} ms")
+                for node_type, table, index, read, planned in nodes:
+                    print(f"    {node_type} on {table}" + (f" using {index}" if index else "")
+                          + (f" ({read} of {planned} partitions read)" if planned > 1 else ""))
+        sys.exit(1 if failures else 0)
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,200 @@
+"""Deterministic stand-in for the google-genai client, and an offline server using it.
+
+StubGeminiClient answers `client.aio.models.generate_content_stream` (and
+`generate_content` and `get`) with google.genai response objects, so
+MeteredGemini, agno's Gemini parsing, the tool dispatcher and the AG-UI
+stream all run unchanged. Only the network call is replaced.
+
+Each scenario in SCENARIOS is a user message and a script of model turns. A
+turn is either a list of tool calls or None, which means a text reply. The
+stub finds the conversation's last user message and counts the tool-result
+turns after it. That count picks the script step, so one run replays the
+same calls every time. Unknown messages get a text reply.
+
+Latency is set per stub:
+- `first_token_ms` before a turn's first chunk;
+- `token_ms` between the text chunks (one chunk per token);
+- `reply_tokens` tokens per reply.
+
+Serve the real app with this stub, with no network and no GOOGLE_API_KEY
+(from the agents directory):
+    uv run python benchmarks/stub_gemini.py --port 8000 --first-token-ms 300 --token-ms 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from google.genai import types
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# name -> (user message, model turns); a turn is [(tool, args), ...] or None for the text reply
+SCENARIOS: Dict[str, tuple] = {
+    'log_meal': ("I just had grilled chicken salad for lunch", [
+        [('lookup_nutrition', {'meal_name': 'grilled chicken salad'})],
+        [('store_meal_data', {'meal_type': 'lunch', 'meal_name': 'Grilled chicken salad', 'calories': 420,
+                              'carbs': 18.0, 'protein': 38.0, 'fat': 21.0, 'fiber': 6.0,
+                              'glycemic_impact': 'low'})],
+        None,
+    ]),
+    'mood_and_glucose': ("Feeling okay today, energy 6 and stress 4. My sugar was 131 after breakfast", [
+        [('store_mood_data', {'mood': 'okay', 'energy': 6, 'stress': 4}),
+         ('store_glucose_data', {'glucose_value': 131})],
+        None,
+    ]),
+    'insights': ("How have I been doing this week?", [
+        [('get_health_insights', {})],
+        None,
+    ]),
+    'meal_plan': ("Can you suggest a vegetarian meal plan for the next 3 days?", [
+        [('get_meal_plan_suggestions', {'dietary_preferences': 'vegetarian', 'days': 3})],
+        None,
+    ]),
+    'chat': ("Which snacks are good for keeping blood sugar steady?", [None]),
+    # Matched by /agui's fast path; never reaches the model
+    'fast_glucose': ("glucose 142", []),
+}
+SCRIPTS = {message: turns for message, turns in SCENARIOS.values()}
+
+REPLY_WORDS = ("Thanks for checking in. Based on what you logged, your numbers look steady. Keep pairing carbs "
+               "with protein and fiber, stay hydrated, and take a short walk after meals. ").split()
+
+
+def _text(part) -> Optional[str]:
+    return getattr(part, 'text', None) if not isinstance(part, dict) else part.get('text')
+
+
+def _is_tool_result(part) -> bool:
+    return (part.get('function_response') if isinstance(part, dict) else getattr(part, 'function_response', None)) is not None
+
+
+def _position(contents: List[Any]):
+    """(last user message text, number of tool-result turns after it)"""
+    tool_turns = 0
+    for content in reversed(contents):
+        parts = content.get('parts', []) if isinstance(content, dict) else (content.parts or [])
+        if any(_is_tool_result(part) for part in parts):
+            tool_turns += 1
+            continue
+        role = content.get('role') if isinstance(content, dict) else content.role
+        if role == 'user':
+            return ''.join(_text(part) or '' for part in parts).strip(), tool_turns
+    return '', tool_turns
+
+
+def _chars(content) -> int:
+    """Text, call arguments and tool results in one content, the parts a real tokenizer would count"""
+    if isinstance(content, str):
+        return len(content)
+    total = 0
+    for part in (content.parts or []) if not isinstance(content, dict) else content.get('parts', []):
+        if isinstance(part, str):
+            total += len(part)
+            continue
+        total += len(getattr(part, 'text', None) or '')
+        if getattr(part, 'function_call', None) is not None:
+            total += len(part.function_call.name or '') + len(json.dumps(part.function_call.args or {}, default=str))
+        if getattr(part, 'function_response', None) is not None:
+            total += len(json.dumps(part.function_response.response or {}, default=str))
+    return total
+
+
+def _usage(prompt_tokens: int, output_tokens: int) -> types.GenerateContentResponseUsageMetadata:
+    return types.GenerateContentResponseUsageMetadata(
+        prompt_token_count=prompt_tokens, candidates_token_count=output_tokens,
+        total_token_count=prompt_tokens + output_tokens,
+    )
+
+
+def _chunk(parts: List[types.Part], usage=None) -> types.GenerateContentResponse:
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role='model', parts=parts))],
+        usage_metadata=usage,
+    )
+
+
+class _Models:
+    def __init__(self, stub: 'StubGeminiClient'):
+        self.stub = stub
+
+    async def generate_content_stream(self, model: str, contents: List[Any], config=None, **kwargs):
+        return self.stub.stream(contents, config)
+
+    async def generate_content(self, model: str, contents: List[Any], config=None,
+                               **kwargs) -> types.GenerateContentResponse:
+        parts, usage = [], None
+        async for chunk in self.stub.stream(contents, config):
+            parts.extend(chunk.candidates[0].content.parts)
+            usage = chunk.usage_metadata or usage
+        texts = [part.text for part in parts if part.text is not None]
+        calls = [part for part in parts if part.function_call is not None]
+        merged = ([types.Part(text=''.join(texts))] if texts else []) + calls
+        return _chunk(merged, usage)
+
+    async def get(self, model: str, **kwargs) -> types.Model:
+        return types.Model(name=f'models/{model}', display_name='stub')
+
+
+class _Aio:
+    def __init__(self, stub: 'StubGeminiClient'):
+        self.models = _Models(stub)
+
+
+class StubGeminiClient:
+    """Scripted google-genai client: no network, fixed tool calls, configurable token latency"""
+
+    def __init__(self, first_token_ms: float = 300, token_ms: float = 10, reply_tokens: int = 40):
+        self.first_token_ms = first_token_ms
+        self.token_ms = token_ms
+        self.reply_tokens = reply_tokens
+        self.aio = _Aio(self)
+        self.turns = 0
+        self.prompt_tokens: List[int] = []  # estimated input size of each call, in order
+
+    async def stream(self, contents: List[Any], config=None):
+        self.turns += 1
+        message, step = _position(contents)
+        script = SCRIPTS.get(message, [None])
+        turn = script[step] if step < len(script) else None
+        # About 4 characters per token; tool declarations are left out
+        system = getattr(config, 'system_instruction', None) if config is not None else None
+        prompt_tokens = (sum(_chars(content) for content in contents) + (_chars(system) if system else 0)) // 4
+        self.prompt_tokens.append(prompt_tokens)
+        await asyncio.sleep(self.first_token_ms / 1000)
+        if turn:
+            calls = [types.Part(function_call=types.FunctionCall(name=name, args=args)) for name, args in turn]
+            yield _chunk(calls, _usage(prompt_tokens, 10 * len(calls)))
+            return
+        for index in range(self.reply_tokens):
+            if index:
+                await asyncio.sleep(self.token_ms / 1000)
+            word = REPLY_WORDS[index % len(REPLY_WORDS)]
+            last = index == self.reply_tokens - 1
+            yield _chunk([types.Part(text=word + ('' if last else ' '))],
+                         _usage(prompt_tokens, self.reply_tokens) if last else None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve agent.py's app with the stub model")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--token-ms", type=float, default=10)
+    parser.add_argument("--reply-tokens", type=int, default=40)
+    args = parser.parse_args()
+
+    os.environ.setdefault("AGNO_TELEMETRY", "false")
+    import uvicorn
+    import agent
+
+    agent.agent_runtime.model_client = StubGeminiClient(args.first_token_ms, args.token_ms, args.reply_tokens)
+    uvicorn.run(agent.app, host=args.host, port=args.port, log_level="warning",
+                timeout_graceful_shutdown=agent.GRACEFUL_SHUTDOWN_SECONDS)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+
+class _LoadAbandoned(Exception):
+    """A single-flight load whose caller was cancelled before it finished"""
+
+
+class LRUCache:
+    """Bounded in-process LRU cache with per-entry TTL and hit/miss/eviction counters"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # Single-flight loads, and loads whose key was written while they ran
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._stale_loads: Set[Hashable] = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value or None (expired entries count as misses)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entries past max_entries"""
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        """Drop a key and make sure an in-flight load for it is not cached"""
+        if key in self._inflight:
+            self._stale_loads.add(key)
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def update(self, key: Hashable, apply: Callable[[Any], None]):
+        """Apply an in-place update to a cached value, if present, without touching its TTL"""
+        if key in self._inflight:
+            self._stale_loads.add(key)
+        entry = self._entries.get(key)
+        if entry is not None:
+            apply(entry[1])
+
+    def clear(self):
+        for key in self._inflight:
+            self._stale_loads.add(key)
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Read-through lookup; concurrent misses for the same key share one load"""
+        while True:
+            value = self.get(key)
+            if value is not None:
+                return value
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            try:
+                return await asyncio.shield(pending)
+            except _LoadAbandoned:
+                # The caller running the load was cancelled; the next waiter starts a fresh one
+                continue
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            # Only this caller was cancelled: the waiters retry instead of being cancelled with it
+            future.set_exception(_LoadAbandoned())
+            future.exception()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark it retrieved so a future nobody else awaited does not log a warning
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            if key not in self._stale_loads:
+                self.set(key, value)
+            return value
+        finally:
+            del self._inflight[key]
+            self._stale_loads.discard(key)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations
+        }
@@ -0,0 +1,157 @@
+"""Deterministic fast path for structured glucose and mood logging.
+
+Messages such as "glucose 142" or "mood good energy 7 stress 3" map to
+exactly one tool call with no judgement involved, so they are handled
+without a model round trip. The tool runs directly, and its result is
+streamed back as the same AG-UI tool-call events the model path emits.
+A short acknowledgement built from that result follows.
+
+Only whole-message matches on the latest user message are taken. Anything
+else falls back to the model, including extra words ("glucose 142 after
+lunch"), a missing field, or a value outside the valid range.
+"""
+import json
+import re
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, NamedTuple, Optional
+
+from ag_ui.core import (
+    BaseEvent,
+    EventType,
+    RunAgentInput,
+    RunErrorEvent,
+    RunFinishedEvent,
+    RunStartedEvent,
+    TextMessageContentEvent,
+    TextMessageEndEvent,
+    TextMessageStartEvent,
+    ToolCallArgsEvent,
+    ToolCallEndEvent,
+    ToolCallResultEvent,
+    ToolCallStartEvent,
+)
+
+import glucose
+import logs
+
+_NUMBER = r'(\d{2,3}(?:\.\d+)?)'
+_UNIT = r'(?:\s*mg\s*/\s*dl)?'
+_END = r'\s*[.!]?\s*$'
+
+# "glucose 142", "my blood sugar is 142 mg/dL", "bg: 98", "142 mg/dl"
+GLUCOSE_PATTERNS = (
+    re.compile(
+        r'^\s*(?:(?:my|current)\s+)?(?:blood\s+)?(?:glucose|sugar|bg)'
+        r'(?:\s+(?:reading|level))?(?:\s+(?:is|was|of|at))?\s*[:=]?\s*' + _NUMBER + _UNIT + _END,
+        re.IGNORECASE,
+    ),
+    re.compile(r'^\s*' + _NUMBER + r'\s*mg\s*/\s*dl' + _END, re.IGNORECASE),
+)
+
+MOODS = ('great', 'good', 'okay', 'poor', 'terrible')
+_MOOD_WORDS = r'(great|good|okay|ok|poor|terrible)'
+_SCALE = r'(\d{1,2})(?:\s*/\s*10)?'
+
+# One "mood good" / "good" / "energy 7" / "stress: 3/10" token at a time, in any order
+MOOD_TOKEN = re.compile(
+    r'\s*(?:mood\s*[:=]?\s*' + _MOOD_WORDS + r'|' + _MOOD_WORDS + r'|(energy|stress)\s*[:=]?\s*' + _SCALE + r')'
+    r'\b\s*[,;]?',
+    re.IGNORECASE,
+)
+
+
+class FastPathMatch(NamedTuple):
+    tool: str
+    args: Dict[str, Any]
+
+
+def match_glucose(text: str) -> Optional[FastPathMatch]:
+    for pattern in GLUCOSE_PATTERNS:
+        found = pattern.match(text)
+        if found:
+            value = float(found.group(1))
+            try:
+                glucose.validate_glucose(value)
+            except ValueError:
+                return None
+            return FastPathMatch('store_glucose_data', {'glucose_value': int(value) if value.is_integer() else value})
+    return None
+
+
+def match_mood(text: str) -> Optional[FastPathMatch]:
+    fields: Dict[str, Any] = {}
+    text = text.rstrip().rstrip('.!').rstrip()
+    pos = 0
+    while pos < len(text):
+        found = MOOD_TOKEN.match(text, pos)
+        if not found or found.end() == pos:
+            return None
+        mood = found.group(1) or found.group(2)
+        key, value = ('mood', mood.lower()) if mood else (found.group(3).lower(), int(found.group(4)))
+        if key in fields:
+            return None
+        fields[key] = value
+        pos = found.end()
+    if fields.keys() != {'mood', 'energy', 'stress'}:
+        return None
+    if not (1 <= fields['energy'] <= 10 and 1 <= fields['stress'] <= 10):
+        return None
+    if fields['mood'] == 'ok':
+        fields['mood'] = 'okay'
+    return FastPathMatch('store_mood_data', fields)
+
+
+def match_message(text: str) -> Optional[FastPathMatch]:
+    """The tool call a message stands for, or None when the model should handle it"""
+    return match_glucose(text) or match_mood(text)
+
+
+def match_run_input(run_input: RunAgentInput) -> Optional[FastPathMatch]:
+    """Match the latest message of a run, if it is a plain-text user message"""
+    if not run_input.messages:
+        return None
+    last = run_input.messages[-1]
+    if last.role != 'user' or not isinstance(last.content, str):
+        return None
+    return match_message(last.content)
+
+
+def acknowledgement(match: FastPathMatch, result: Dict[str, Any]) -> str:
+    """The reply text shown after a fast-path tool call, built from its result"""
+    if result.get('status') == 'error':
+        # ToolBudget's timeout or admission result: pass its explanation on instead of the analysis
+        return f"{result['error']}. {result.get('note', '')}".strip()
+    if match.tool == 'store_glucose_data':
+        return f"Logged. {result['analysis']} {result['recommendation']}"
+    return ' '.join(["Logged.", result['insights'], *result['recommendations']])
+
+
+async def run(run_input: RunAgentInput, match: FastPathMatch,
+              tools: Dict[str, Callable[..., Awaitable[str]]]) -> AsyncIterator[BaseEvent]:
+    """Run the matched tool and stream it as AG-UI events, in the order the model path uses"""
+    run_id = run_input.run_id or str(uuid.uuid4())
+    message_id = str(uuid.uuid4())
+    tool_call_id = str(uuid.uuid4())
+    yield RunStartedEvent(type=EventType.RUN_STARTED, thread_id=run_input.thread_id, run_id=run_id)
+    try:
+        yield ToolCallStartEvent(
+            type=EventType.TOOL_CALL_START, tool_call_id=tool_call_id,
+            tool_call_name=match.tool, parent_message_id=message_id,
+        )
+        yield ToolCallArgsEvent(type=EventType.TOOL_CALL_ARGS, tool_call_id=tool_call_id, delta=json.dumps(match.args))
+        yield ToolCallEndEvent(type=EventType.TOOL_CALL_END, tool_call_id=tool_call_id)
+        content = await tools[match.tool](**match.args)
+        yield ToolCallResultEvent(
+            type=EventType.TOOL_CALL_RESULT, tool_call_id=tool_call_id, content=content,
+            role='tool', message_id=str(uuid.uuid4()),
+        )
+        yield TextMessageStartEvent(type=EventType.TEXT_MESSAGE_START, message_id=message_id, role='assistant')
+        yield TextMessageContentEvent(
+            type=EventType.TEXT_MESSAGE_CONTENT, message_id=message_id,
+            delta=acknowledgement(match, json.loads(content)),
+        )
+        yield TextMessageEndEvent(type=EventType.TEXT_MESSAGE_END, message_id=message_id)
+        yield RunFinishedEvent(type=EventType.RUN_FINISHED, thread_id=run_input.thread_id, run_id=run_id)
+    except Exception as e:
+        logs.logger.error("fast path failed", exc_info=True, extra={'tool': match.tool})
+        yield RunErrorEvent(type=EventType.RUN_ERROR, message=str(e))
@@ -0,0 +1,324 @@
+"""Glucose validation/classification rules and bulk CGM ingestion.
+
+Bulk ingestion stream-parses CSV or NDJSON, validates every reading with
+the same rules as single readings, and COPYs accepted rows in fixed-size
+chunks. Memory and held connections stay bounded however large the
+upload is. Each chunk commits on its own, so an interrupted upload keeps
+the chunks that were already loaded; the summary reports what was stored.
+"""
+import codecs
+import csv
+import json
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+GLUCOSE_MIN = 60
+GLUCOSE_MAX = 400
+
+# Accepted header names (case-insensitive) for CSV exports and NDJSON keys
+VALUE_FIELDS = ('value', 'glucose', 'glucose_value', 'glucose value (mg/dl)', 'sgv', 'mg/dl')
+TIMESTAMP_FIELDS = ('timestamp', 'time', 'date', 'datetime', 'timestamp (yyyy-mm-ddthh:mm:ss)', 'dateString')
+
+MAX_REPORTED_ERRORS = 5
+
+# A CSV record whose quoted field is still open after this many lines is rejected
+MAX_RECORD_LINES = 100
+
+
+def validate_glucose(value: float):
+    """Raise ValueError for readings outside the accepted range"""
+    if not (GLUCOSE_MIN <= value <= GLUCOSE_MAX):
+        raise ValueError(f"Glucose value {value} is outside valid range ({GLUCOSE_MIN}-{GLUCOSE_MAX} mg/dL)")
+
+
+def classify_glucose(value: float) -> Tuple[str, str]:
+    """Return (status, recommendation) for a validated reading"""
+    if value < 80:
+        return 'low', 'Your glucose is low. Consider consuming 15g fast-acting carbs and recheck in 15 minutes.'
+    if value > 180:
+        return 'high', 'Your glucose is elevated. Consider light activity if appropriate and monitor closely.'
+    return 'normal', 'Glucose is in target range. Keep up the good work!'
+
+
+def parse_timestamp(raw: Any) -> datetime:
+    """ISO-8601 string (or epoch seconds) to a naive local datetime, matching how readings are stored"""
+    if isinstance(raw, (int, float)):
+        return datetime.fromtimestamp(raw)
+    text = str(raw).strip()
+    if text.endswith('Z'):
+        text = text[:-1] + '+00:00'
+    parsed = datetime.fromisoformat(text)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into decoded lines without buffering the whole body"""
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    pending = ''
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            yield line.rstrip('\r')
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending.rstrip('\r')
+
+
+def _pick(fields: Dict[str, Any], names: Iterable[str]) -> Any:
+    lowered = {key.strip().lower(): value for key, value in fields.items()}
+    for name in names:
+        if name.lower() in lowered:
+            return lowered[name.lower()]
+    return None
+
+
+class Malformed(str):
+    """A parser's stand-in for the value of a record it could not read; ingest rejects it with this reason"""
+
+
+MALFORMED_CSV = Malformed("malformed CSV record (a quoted field is never closed)")
+
+
+class _LineFeed:
+    """Iterator the csv reader pulls from; lines are pushed in as they arrive"""
+
+    def __init__(self):
+        self.lines = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+def _ends_quoted(line: str, quoted: bool) -> bool:
+    """Whether a line leaves a quoted field open, by the csv module's rules
+
+    A quote opens a quoted field only as a field's first character; inside one,
+    `""` is an escaped quote and a lone `"` closes it. A quote anywhere else
+    (`1"30`) is plain data.
+    """
+    state = 'quoted' if quoted else 'start'
+    for char in line:
+        if state == 'quoted':
+            if char == '"':
+                state = 'closing'
+        elif char == ',':
+            state = 'start'
+        elif state == 'closing':
+            state = 'quoted' if char == '"' else 'field'
+        elif state == 'start':
+            state = 'quoted' if char == '"' else 'field'
+    return state == 'quoted'
+
+
+class _CsvRecords:
+    """Groups lines into CSV records for one csv.reader; quoted fields may span lines
+
+    Each record goes to the reader once its last line closes every quoted field,
+    so the reader gets exactly one record per next(). A record still open after
+    MAX_RECORD_LINES lines, or at the end of the body, is rejected at its first
+    line and the lines after it are read again as records of their own.
+    """
+
+    def __init__(self):
+        self.feed = _LineFeed()
+        self.reader = csv.reader(self.feed)
+        self.pending: deque = deque()  # (line number, line) of the open record
+        self.quoted = False
+
+    def push(self, line_no: int, line: str) -> Iterator[Tuple[int, Optional[List[str]]]]:
+        if not self.pending and not line.strip():
+            return
+        self.pending.append((line_no, line))
+        self.quoted = _ends_quoted(line, self.quoted)
+        if not self.quoted:
+            yield self._record()
+        elif len(self.pending) >= MAX_RECORD_LINES:
+            yield from self._abandon()
+
+    def finish(self) -> Iterator[Tuple[int, Optional[List[str]]]]:
+        while self.pending:
+            yield from self._abandon()
+
+    def _record(self) -> Tuple[int, Optional[List[str]]]:
+        start = self.pending[0][0]
+        self.feed.lines.extend(line + '\n' for _, line in self.pending)
+        self.pending.clear()
+        try:
+            return start, next(self.reader)
+        except csv.Error:
+            # e.g. a NUL byte or an oversized field
+            self.feed.lines.clear()
+            return start, None
+
+    def _abandon(self) -> Iterator[Tuple[int, Optional[List[str]]]]:
+        start, _ = self.pending.popleft()
+        rest = list(self.pending)
+        self.pending.clear()
+        self.quoted = False
+        yield start, None
+        for line_no, line in rest:
+            yield from self.push(line_no, line)
+
+
+async def _csv_records(lines: AsyncIterable[str]) -> AsyncIterator[Tuple[int, Optional[List[str]]]]:
+    """Yield (first line number, fields) per CSV record; fields is None for a record that cannot be read"""
+    records = _CsvRecords()
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        for record in records.push(line_no, line):
+            yield record
+    for record in records.finish():
+        yield record
+
+
+async def parse_csv(lines: AsyncIterable[str]) -> AsyncIterator[Tuple[int, Any, Any]]:
+    """Yield (line number, raw value, raw timestamp) from a CSV with a header row"""
+    header = None
+    async for line_no, row in _csv_records(lines):
+        if row is None:
+            yield line_no, MALFORMED_CSV, None
+            if header is None:
+                # Without a readable header no row can be mapped; each is rejected for its missing value
+                header = []
+            continue
+        if header is None:
+            header = row
+            continue
+        fields = dict(zip(header, row))
+        yield line_no, _pick(fields, VALUE_FIELDS), _pick(fields, TIMESTAMP_FIELDS)
+
+
+async def parse_ndjson(lines: AsyncIterable[str]) -> AsyncIterator[Tuple[int, Any, Any]]:
+    """Yield (line number, raw value, raw timestamp) from one JSON object per line"""
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            fields = json.loads(line)
+        except ValueError:
+            yield line_no, None, None
+            continue
+        if not isinstance(fields, dict):
+            yield line_no, None, None
+            continue
+        yield line_no, _pick(fields, VALUE_FIELDS), _pick(fields, TIMESTAMP_FIELDS)
+
+
+async def iter_readings(readings: List[Dict[str, Any]]) -> AsyncIterator[Tuple[int, Any, Any]]:
+    """Adapt an in-memory list of {'value', 'timestamp'} dicts (the agent tool) to the parser shape"""
+    for index, reading in enumerate(readings, start=1):
+        if isinstance(reading, dict):
+            yield index, _pick(reading, VALUE_FIELDS), _pick(reading, TIMESTAMP_FIELDS)
+        else:
+            yield index, None, None
+
+
+class IngestSummary:
+    """Running counts for a bulk load; never holds the readings themselves"""
+
+    def __init__(self):
+        self.accepted = 0
+        self.rejected = 0
+        self.by_status = {'low': 0, 'normal': 0, 'high': 0}
+        self.total_value = 0.0
+        self.first_timestamp: Optional[datetime] = None
+        self.last_timestamp: Optional[datetime] = None
+        self.errors: List[str] = []
+        # Set when the load stopped early (a failed COPY or a broken upload); rows validated but not stored
+        self.error: Optional[str] = None
+        self.not_stored = 0
+
+    def fail(self, exc: Exception, pending_rows: int):
+        self.error = f"{type(exc).__name__}: {exc}" if str(exc) else type(exc).__name__
+        self.not_stored += pending_rows
+
+    def reject(self, line_no: int, reason: str):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"line {line_no}: {reason}")
+
+    def accept(self, value: float, status: str, timestamp: datetime):
+        self.accepted += 1
+        self.by_status[status] += 1
+        self.total_value += value
+        if self.first_timestamp is None or timestamp < self.first_timestamp:
+            self.first_timestamp = timestamp
+        if self.last_timestamp is None or timestamp > self.last_timestamp:
+            self.last_timestamp = timestamp
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'by_status': self.by_status,
+            'time_in_range_pct': round(100 * self.by_status['normal'] / self.accepted, 1) if self.accepted else None,
+            'average': round(self.total_value / self.accepted, 1) if self.accepted else None,
+            'first_timestamp': self.first_timestamp.isoformat() if self.first_timestamp else None,
+            'last_timestamp': self.last_timestamp.isoformat() if self.last_timestamp else None,
+            'errors': self.errors,
+            'error': self.error,
+            'not_stored': self.not_stored,
+        }
+
+
+async def ingest(get_connection: Callable, user_id: str, rows: AsyncIterable[Tuple[int, Any, Any]],
+                 chunk_rows: int = 5000) -> IngestSummary:
+    """Validate parsed rows and COPY them into glucose_reading in chunks of `chunk_rows`"""
+    summary = IngestSummary()
+    chunk = []
+    chunk_counts = []
+
+    async def flush():
+        async with get_connection() as conn:
+            await conn.copy_records_to_table(
+                'glucose_reading', records=chunk, columns=['id', 'user_id', 'value', 'status', 'timestamp']
+            )
+        # Only count readings once their chunk has been committed
+        for value, status, timestamp in chunk_counts:
+            summary.accept(value, status, timestamp)
+        chunk.clear()
+        chunk_counts.clear()
+
+    try:
+        async for line_no, raw_value, raw_timestamp in rows:
+            if isinstance(raw_value, Malformed):
+                summary.reject(line_no, raw_value)
+                continue
+            if raw_value is None or raw_value == '':
+                summary.reject(line_no, "no glucose value found")
+                continue
+            if raw_timestamp is None or raw_timestamp == '':
+                summary.reject(line_no, "missing timestamp")
+                continue
+            try:
+                value = float(raw_value)
+                validate_glucose(value)
+                timestamp = parse_timestamp(raw_timestamp)
+            except (TypeError, ValueError, OverflowError, OSError) as exc:
+                summary.reject(line_no, str(exc))
+                continue
+            status, _ = classify_glucose(value)
+            chunk.append((str(uuid.uuid4()), user_id, value, status, timestamp))
+            chunk_counts.append((value, status, timestamp))
+            if len(chunk) >= chunk_rows:
+                await flush()
+        if chunk:
+            await flush()
+    except Exception as exc:
+        # A failed COPY or a broken upload stream (e.g. the client went away). Earlier
+        # chunks are committed, so stop here and report what was stored rather than raise
+        summary.fail(exc, len(chunk))
+    return summary
@@ -0,0 +1,210 @@
+"""Structured, sampled, non-blocking logging for the agent service.
+
+Records are filtered and formatted on the calling thread, then handed to a
+bounded queue. A QueueListener thread does the actual stream I/O, so the
+event loop never blocks on stdout. When the queue is full, records are
+dropped and counted rather than blocking.
+
+Sampling is decided once per request, from a hash of its request id, so a
+sampled request keeps all of its lines (middleware and tool calls alike).
+WARNING and above are never sampled out. Routes with a rate of 0, such as
+/health by default, are not logged at all.
+
+Configuration (environment):
+    LOG_LEVEL=INFO                     # or OFF to disable logging entirely
+    LOG_FORMAT=json                    # or text
+    LOG_SAMPLE_RATES=DEBUG=0.01,INFO=1
+    LOG_ROUTE_SAMPLE_RATES=/health=0,/metrics=0
+    LOG_QUEUE_SIZE=10000
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import zlib
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, TextIO
+
+# Set by the middleware for each request and read back by every record
+request_id: ContextVar[str] = ContextVar('request_id', default='-')
+request_route: ContextVar[str] = ContextVar('request_route', default='')
+
+logger = logging.getLogger('healthcare')
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RESERVED = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'taskName'}
+
+_dumps = json.JSONEncoder(default=str, separators=(',', ':')).encode
+
+
+def _parse_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        key, _, rate = item.partition('=')
+        rates[key.strip()] = float(rate)
+    return rates
+
+
+class ContextFilter(logging.Filter):
+    """Stamp request_id/user_id/route from context variables onto each record"""
+
+    def __init__(self, context: Dict[str, ContextVar]):
+        super().__init__()
+        self.context = context
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for name, var in self.context.items():
+            if not hasattr(record, name):
+                setattr(record, name, var.get())
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of records per level and per route prefix; WARNING+ always passes"""
+
+    def __init__(self, level_rates: Dict[str, float], route_rates: Dict[str, float]):
+        super().__init__()
+        self.level_rates = {logging.getLevelName(name.upper()): rate for name, rate in level_rates.items()}
+        # Longest prefix wins
+        self.route_rates = sorted(route_rates.items(), key=lambda item: -len(item[0]))
+        self.sampled_out = 0
+
+    def _rate(self, record: logging.LogRecord) -> float:
+        rate = self.level_rates.get(record.levelno, 1.0)
+        route = getattr(record, 'route', '')
+        for prefix, route_rate in self.route_rates:
+            if route == prefix or route.startswith(prefix.rstrip('/') + '/'):
+                return rate * route_rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record)
+        if rate >= 1:
+            return True
+        rid = getattr(record, 'request_id', '-')
+        draw = zlib.crc32(rid.encode()) / 2 ** 32 if rid != '-' else random.random()
+        if draw < rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, request/user ids and any `extra` fields.
+
+    DroppingQueueHandler.prepare() has already folded any traceback into msg.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        fields = vars(record)
+        for key in fields.keys() - _RESERVED:
+            value = fields[key]
+            if value is not None and value != '' and value != '-':
+                entry[key] = value
+        return _dumps(entry)
+
+
+_exception_formatter = logging.Formatter()
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The 'healthcare' logger does not propagate and has only this handler, so
+        # the record can be finalized in place; the base class copies and formats it
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.msg += '\n' + _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+            record.exc_text = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _State:
+    handler: Optional[DroppingQueueHandler] = None
+    listener: Optional[logging.handlers.QueueListener] = None
+    sampler: Optional[SamplingFilter] = None
+
+
+def setup_logging(context: Dict[str, ContextVar], stream: TextIO = None, level: str = None,
+                  fmt: str = None, level_rates: str = None, route_rates: str = None,
+                  queue_size: int = None) -> logging.Logger:
+    """Configure the 'healthcare' logger (idempotent); arguments default to the LOG_* environment"""
+    shutdown_logging()
+    level = (level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+    logger.handlers.clear()
+    logger.propagate = False
+    if level == 'OFF':
+        logger.disabled = True
+        return logger
+    logger.disabled = False
+    logger.setLevel(level)
+
+    sink = logging.StreamHandler(stream or sys.stdout)
+    if (fmt or os.getenv('LOG_FORMAT', 'json')) == 'json':
+        sink.setFormatter(JsonFormatter())
+    else:
+        sink.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(request_id)s] %(message)s'))
+
+    handler = DroppingQueueHandler(queue.Queue(queue_size or int(os.getenv('LOG_QUEUE_SIZE', 10000))))
+    # Both filters run on the caller's thread, where the context variables are set
+    handler.addFilter(ContextFilter({'request_id': request_id, 'route': request_route, **context}))
+    sampler = SamplingFilter(
+        _parse_rates(level_rates if level_rates is not None else os.getenv('LOG_SAMPLE_RATES', '')),
+        _parse_rates(route_rates if route_rates is not None else os.getenv('LOG_ROUTE_SAMPLE_RATES', '/health=0,/metrics=0'))
+    )
+    handler.addFilter(sampler)
+    logger.addHandler(handler)
+
+    _State.handler, _State.sampler = handler, sampler
+    _State.listener = logging.handlers.QueueListener(handler.queue, sink, respect_handler_level=False)
+    _State.listener.start()
+    return logger
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    if _State.listener is not None:
+        _State.listener.stop()
+        _State.listener = None
+
+
+# Records still queued at interpreter exit are flushed, not lost
+atexit.register(shutdown_logging)
+
+
+def logging_stats() -> Dict[str, Any]:
+    handler, sampler = _State.handler, _State.sampler
+    if handler is None or logger.disabled:
+        return {'enabled': False}
+    return {
+        'enabled': True,
+        'queued': handler.queue.qsize(),
+        'dropped': handler.dropped,
+        'sampled_out': sampler.sampled_out,
+    }
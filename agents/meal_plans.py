@@ -0,0 +1,151 @@
+"""Meal plans selected from a data-driven catalog.
+
+meal_catalog.json is loaded once into NumPy columns. Every
+(slot, dietary preference, highest glycemic level) combination gets a
+precomputed array of row indices. Preferences are defined by macro
+ranges (low-carb, high-protein) or by tag (vegetarian), so building a
+plan is a dictionary lookup plus a vectorized score over a few dozen rows.
+
+Each slot gets a share of the user's daily calorie and carb targets. The
+meal closest to that share wins, with carbs over target and repeats within
+the plan penalized. Snacks then fill what is left of the day's calories.
+"""
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+DEFAULT_CATALOG = Path(__file__).with_name('meal_catalog.json')
+
+SLOTS = ('breakfast', 'lunch', 'dinner', 'snack')
+MAIN_SLOTS = ('breakfast', 'lunch', 'dinner')
+SLOT_SHARE = {'breakfast': 0.25, 'lunch': 0.35, 'dinner': 0.30}
+MACROS = ('calories', 'carbs', 'protein', 'fat', 'fiber')
+GLYCEMIC_LEVELS = ('low', 'medium', 'high')
+PREFERENCES = ('balanced', 'low-carb', 'high-protein', 'vegetarian')
+
+# Macro ranges that define the preferences, as a share of a meal's calories
+LOW_CARB_MAX_SHARE = 0.26
+HIGH_PROTEIN_MIN_SHARE = 0.30
+
+# Daily targets: used when the user has logged meals on fewer than MIN_LOGGED_DAYS days
+DEFAULT_CALORIES = 2000
+CALORIE_RANGE = (1200, 3000)
+MIN_LOGGED_DAYS = 3
+MAX_CARB_SHARE = 0.45     # of daily calories
+LOW_CARB_GRAMS = 100      # daily cap for low-carb plans and high glucose
+
+MAX_SNACKS = 3
+MIN_SNACK_CALORIES = 60
+REPEAT_PENALTY = 0.5      # per earlier use of the same meal in the plan
+CARB_OVER_PENALTY = 2.0
+
+
+class MealCatalog:
+    """Catalog meals as NumPy columns with per (slot, preference, glycemic cap) row indexes"""
+
+    def __init__(self, meals: List[Dict[str, Any]]):
+        self.names = tuple(meal['name'] for meal in meals)
+        self.glycemic = tuple(meal['glycemic_impact'] for meal in meals)
+        self.values = np.array([[meal[macro] for macro in MACROS] for meal in meals], dtype=np.float64)
+        gi = np.array([GLYCEMIC_LEVELS.index(meal['glycemic_impact']) for meal in meals], dtype=np.int8)
+        slot = np.array([SLOTS.index(meal['slot']) for meal in meals], dtype=np.int8)
+        calories, carbs, protein = self.values[:, 0], self.values[:, 1], self.values[:, 2]
+        diets = {
+            'balanced': np.ones(len(meals), dtype=bool),
+            'low-carb': carbs * 4 <= LOW_CARB_MAX_SHARE * calories,
+            'high-protein': protein * 4 >= HIGH_PROTEIN_MIN_SHARE * calories,
+            'vegetarian': np.array([bool(meal.get('vegetarian')) for meal in meals]),
+        }
+        # Row indices plus their own calorie/carb columns, so a pick needs no gather
+        self.index = {}
+        for s, slot_name in enumerate(SLOTS):
+            for preference in PREFERENCES:
+                for level in range(len(GLYCEMIC_LEVELS)):
+                    rows = np.flatnonzero((slot == s) & diets[preference] & (gi <= level))
+                    self.index[slot_name, preference, level] = (rows, calories[rows], carbs[rows])
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> 'MealCatalog':
+        with open(path or DEFAULT_CATALOG) as f:
+            return cls(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _candidates(self, slot: str, preference: str, max_glycemic: int):
+        # Relax the glycemic cap, then the preference, rather than leave a slot empty
+        for key in ((slot, preference, max_glycemic), (slot, preference, 2),
+                    (slot, 'balanced', max_glycemic), (slot, 'balanced', 2)):
+            candidates = self.index[key]
+            if len(candidates[0]):
+                return candidates
+        raise ValueError(f"Meal catalog has no {slot} entries")
+
+    @staticmethod
+    def _pick(candidates, calories: float, carbs: float, used: np.ndarray) -> int:
+        rows, meal_calories, meal_carbs = candidates
+        score = (np.abs(meal_calories - calories) * (1 / max(calories, 1))
+                 + np.maximum(meal_carbs - carbs, 0) * (CARB_OVER_PENALTY / max(carbs, 1))
+                 + used[rows] * REPEAT_PENALTY)
+        return int(rows[score.argmin()])
+
+    def _meal(self, row: int) -> Dict[str, Any]:
+        meal = {'name': self.names[row]}
+        meal.update(zip(MACROS, self.values[row].tolist()))
+        meal['calories'] = int(meal['calories'])
+        meal['glycemic_impact'] = self.glycemic[row]
+        return meal
+
+    def plan(self, preference: str, days: int, calories: float, carbs: float,
+             max_glycemic: str = 'medium') -> List[Dict[str, Any]]:
+        """One entry per day: breakfast/lunch/dinner, snack names and the day's totals"""
+        preference = preference if preference in PREFERENCES else 'balanced'
+        level = GLYCEMIC_LEVELS.index(max_glycemic)
+        main = [(slot, self._candidates(slot, preference, level)) for slot in MAIN_SLOTS]
+        snack_candidates = self._candidates('snack', preference, level)
+        # Times each meal has been picked so far; a snack picked today is not picked again today
+        used = np.zeros(len(self.names))
+        plan = []
+        for _ in range(days):
+            day, chosen = {}, []
+            day_calories = day_carbs = 0.0
+            for slot, candidates in main:
+                row = self._pick(candidates, calories * SLOT_SHARE[slot], carbs * SLOT_SHARE[slot], used)
+                used[row] += 1
+                chosen.append(row)
+                day[slot] = self._meal(row)
+                day_calories += self.values[row, 0]
+                day_carbs += self.values[row, 1]
+            snacks = []
+            while len(snacks) < MAX_SNACKS and calories - day_calories >= MIN_SNACK_CALORIES:
+                row = self._pick(snack_candidates, calories - day_calories, max(carbs - day_carbs, 0), used)
+                if row in snacks:
+                    break
+                used[row] += 1
+                chosen.append(row)
+                snacks.append(row)
+                day_calories += self.values[row, 0]
+                day_carbs += self.values[row, 1]
+            day['snacks'] = [self.names[row] for row in snacks]
+            day['totals'] = {macro: round(value, 1) for macro, value in
+                             zip(MACROS, self.values[chosen].sum(axis=0).tolist())}
+            plan.append(day)
+        return plan
+
+
+def targets(intake: Dict[str, Any], preference: str, glucose_status: str) -> Dict[str, Any]:
+    """Daily calorie/carb targets from the user's logged intake, and the glycemic cap for the plan"""
+    if intake['days_logged'] >= MIN_LOGGED_DAYS:
+        calories = float(np.clip(intake['calories_per_day'], *CALORIE_RANGE))
+        carbs = min(intake['carbs_per_day'], calories * MAX_CARB_SHARE / 4)
+        basis = f"average of {intake['days_logged']} logged days"
+    else:
+        calories = DEFAULT_CALORIES
+        carbs = calories * MAX_CARB_SHARE / 4
+        basis = f'default (fewer than {MIN_LOGGED_DAYS} logged days)'
+    if preference == 'low-carb' or glucose_status == 'high':
+        carbs = min(carbs, LOW_CARB_GRAMS)
+    max_glycemic = {'high': 'low', 'low': 'high'}.get(glucose_status, 'medium')
+    return {'calories': round(calories), 'carbs': round(carbs), 'max_glycemic_impact': max_glycemic, 'basis': basis}
@@ -0,0 +1,53 @@
+"""Gemini model that records its calls in /metrics.
+
+Imported by agent.build_agent_os in the background agent load, so that
+google-genai is not imported at startup.
+"""
+import asyncio
+import time
+
+from agno.models.google import Gemini
+
+import metrics
+
+
+class MeteredGemini(Gemini):
+    """Gemini that records call latency, time to first chunk and token counts in /metrics"""
+
+    async def ainvoke_stream(self, *args, **kwargs):
+        started = time.perf_counter()
+        outcome, usage, first = 'error', None, True
+        try:
+            async for response in super().ainvoke_stream(*args, **kwargs):
+                if first:
+                    metrics.MODEL_FIRST_CHUNK_SECONDS.observe(time.perf_counter() - started, self.id)
+                    first = False
+                # Gemini reports cumulative usage on the streamed chunks; the last one is the total
+                usage = response.response_usage or usage
+                yield response
+            outcome = 'ok'
+        except (asyncio.CancelledError, GeneratorExit):
+            outcome = 'cancelled'
+            raise
+        finally:
+            self._record(started, outcome, usage)
+
+    async def ainvoke(self, *args, **kwargs):
+        started = time.perf_counter()
+        outcome, usage = 'error', None
+        try:
+            response = await super().ainvoke(*args, **kwargs)
+            outcome, usage = 'ok', response.response_usage
+            return response
+        except asyncio.CancelledError:
+            outcome = 'cancelled'
+            raise
+        finally:
+            self._record(started, outcome, usage)
+
+    def _record(self, started: float, outcome: str, usage):
+        metrics.MODEL_SECONDS.observe(time.perf_counter() - started, self.id)
+        metrics.MODEL_CALLS.inc(self.id, outcome)
+        if usage is not None:
+            metrics.MODEL_TOKENS.inc(self.id, 'input', amount=usage.input_tokens or 0)
+            metrics.MODEL_TOKENS.inc(self.id, 'output', amount=usage.output_tokens or 0)
@@ -0,0 +1,315 @@
+"""In-process Prometheus metrics for the agent service.
+
+Counters and histograms are aggregated in plain dicts keyed by label
+values. An observation is a dict lookup, a bisect and two additions, with
+no locks and no background work. Everything that records runs on the
+event loop thread. Gauges (pool, caches, write buffer, logging queue) are
+callbacks read only at scrape time. GET /metrics renders the Prometheus
+text format (0.0.4), so a scrape every few seconds is cheap and testing
+needs nothing beyond an HTTP request.
+
+The service metrics are declared at the bottom of this module and recorded
+by the middleware, the AG-UI endpoint, the model wrapper, ToolBudget and
+HealthDataManager.
+
+With several worker processes, a scrape reaches only one of them.
+SharedMetrics gives every worker the same view. Each worker writes a JSON
+snapshot of its registry to a shared directory every few seconds, and once
+more when it exits. A scrape then merges all the snapshots: counters and
+histograms are summed over workers, including workers that have exited, so
+totals never go backwards while the server runs. Gauges are reported per
+worker (label `worker`), and only for workers whose snapshot is recent.
+"""
+import asyncio
+import functools
+import json
+import math
+import os
+import time
+from pathlib import Path
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; covers sub-ms DB calls up to long model streams
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: Sequence[str], values: Sequence[Any]) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def snapshot(self) -> List:
+        return [[list(labels), value] for labels, value in list(self._values.items())]
+
+    def merge(self, snapshot: List):
+        for labels, value in snapshot:
+            self.inc(*labels, amount=value)
+
+    def render(self) -> Iterable[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} counter'
+        for labels, value in list(self._values.items()):
+            yield f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}'
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series: Dict[Tuple, List] = {}
+
+    def observe(self, value: float, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def snapshot(self) -> List:
+        return [[list(labels), list(counts), total, count] for labels, (counts, total, count) in list(self._series.items())]
+
+    def merge(self, snapshot: List):
+        for labels, counts, total, count in snapshot:
+            series = self._series.setdefault(tuple(labels), [[0] * (len(self.buckets) + 1), 0.0, 0])
+            series[0] = [mine + theirs for mine, theirs in zip(series[0], counts)]
+            series[1] += total
+            series[2] += count
+
+    def time(self, label_from_name: bool = True):
+        """Decorator observing an async function's duration, labelled with its name"""
+        def decorate(fn):
+            labels = (fn.__name__,) if label_from_name else ()
+
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - started, *labels)
+
+            return wrapper
+        return decorate
+
+    def render(self) -> Iterable[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} histogram'
+        bounds = [f'le="{_number(bound)}"' for bound in self.buckets + (math.inf,)]
+        for labels, (counts, total, count) in list(self._series.items()):
+            label_str = _labels(self.labelnames, labels)
+            prefix = f'{self.name}_bucket{label_str[:-1]},' if label_str else f'{self.name}_bucket{{'
+            cumulative = 0
+            for le, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                yield f'{prefix}{le}}} {cumulative}'
+            yield f'{self.name}_sum{label_str} {_number(total)}'
+            yield f'{self.name}_count{label_str} {count}'
+
+
+class Gauge:
+    """Read at scrape time from a callback returning a number, or {label values: number}"""
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], Any], labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+        self.labelnames = tuple(labelnames)
+
+    def values(self) -> Dict[Tuple, float]:
+        values = self.read()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return {
+            labels if isinstance(labels, tuple) else (labels,): value
+            for labels, value in values.items() if value is not None
+        }
+
+    def snapshot(self) -> List:
+        return [[list(labels), value] for labels, value in self.values().items()]
+
+    def render(self) -> Iterable[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} gauge'
+        for labels, value in self.values().items():
+            yield f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}'
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, Any] = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, read: Callable[[], Any], labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, read, labelnames))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self, gauges: bool = True) -> Dict[str, List]:
+        return {
+            name: metric.snapshot() for name, metric in list(self.metrics.items())
+            if gauges or not isinstance(metric, Gauge)
+        }
+
+
+class SharedMetrics:
+    """Per-worker snapshots in a shared directory, merged into one exposition at scrape time"""
+
+    def __init__(self, directory: str, registry: Optional[Registry] = None, interval: float = 5.0):
+        self.directory = Path(directory)
+        self.registry = registry or REGISTRY
+        self.interval = interval
+        self.worker = str(os.getpid())
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def path(self) -> Path:
+        return self.directory / f'{self.worker}.json'
+
+    def write(self, gauges: bool = True):
+        """Replace this worker's snapshot atomically (readers never see a partial file)"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        tmp.write_text(json.dumps({'gauges': gauges, 'metrics': self.registry.snapshot(gauges)}))
+        os.replace(tmp, self.path)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.write()
+
+    def start(self):
+        self.write()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Final snapshot without gauges: the counters stay in the totals, the worker's gauges go"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.write(gauges=False)
+
+    def _snapshots(self) -> Dict[str, Dict[str, Any]]:
+        snapshots, fresh_after = {}, time.time() - 3 * self.interval
+        for path in self.directory.glob('*.json'):
+            try:
+                snapshot = json.loads(path.read_text())
+                if snapshot['gauges'] and path.stat().st_mtime < fresh_after:
+                    snapshot['gauges'] = False  # a worker that died without its final write
+            except (OSError, ValueError):
+                continue  # removed or replaced while listing
+            snapshots[path.stem] = snapshot
+        return snapshots
+
+    def render(self) -> str:
+        self.write()
+        snapshots = self._snapshots()
+        merged = Registry()
+        for name, metric in list(self.registry.metrics.items()):
+            if isinstance(metric, Gauge):
+                values = {
+                    (*labels, worker): value
+                    for worker, snapshot in snapshots.items() if snapshot['gauges']
+                    for labels, value in snapshot['metrics'].get(name, [])
+                }
+                merged.gauge(name, metric.documentation, lambda values=values: values,
+                             metric.labelnames + ('worker',))
+                continue
+            if isinstance(metric, Histogram):
+                total = Histogram(name, metric.documentation, metric.labelnames, metric.buckets)
+            else:
+                total = Counter(name, metric.documentation, metric.labelnames)
+            for snapshot in snapshots.values():
+                total.merge(snapshot['metrics'].get(name, []))
+            merged.register(total)
+        return merged.render()
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    'http_requests_total', 'HTTP requests by method, route template and status', ('method', 'route', 'status'))
+HTTP_SECONDS = REGISTRY.histogram(
+    'http_request_duration_seconds', 'HTTP request duration, including streamed bodies', ('method', 'route'))
+
+AGUI_RUNS = REGISTRY.counter(
+    'agui_runs_total', 'AG-UI runs by path (fast_path/model) and outcome', ('path', 'outcome'))
+AGUI_STREAM_SECONDS = REGISTRY.histogram(
+    'agui_stream_duration_seconds', 'AG-UI run stream duration', ('path',))
+AGUI_FIRST_TOKEN_SECONDS = REGISTRY.histogram(
+    'agui_time_to_first_token_seconds', 'Time from run start to the first text content event', ('path',))
+
+MODEL_CALLS = REGISTRY.counter(
+    'model_calls_total', 'Model API calls by model and outcome', ('model', 'outcome'))
+MODEL_SECONDS = REGISTRY.histogram(
+    'model_call_duration_seconds', 'Model API call duration (whole stream)', ('model',))
+MODEL_FIRST_CHUNK_SECONDS = REGISTRY.histogram(
+    'model_time_to_first_chunk_seconds', 'Model API time to the first streamed chunk', ('model',))
+MODEL_TOKENS = REGISTRY.counter(
+    'model_tokens_total', 'Model tokens by model and kind (input/output)', ('model', 'kind'))
+
+TOOL_CALLS = REGISTRY.counter(
+    'tool_calls_total', 'Tool calls by tool and outcome (ok/error/timeout/cancelled/rejected)', ('tool', 'outcome'))
+TOOL_SECONDS = REGISTRY.histogram(
+    'tool_call_duration_seconds', 'Tool call duration', ('tool',))
+
+DB_SECONDS = REGISTRY.histogram(
+    'db_method_duration_seconds', 'HealthDataManager method duration (database work plus caching)', ('method',))
+ADMISSION_REJECTED = REGISTRY.counter(
+    'admission_rejected_total', 'Work shed by admission control by limiter and reason', ('limiter', 'reason'))
+ADMISSION_WAIT_SECONDS = REGISTRY.histogram(
+    'admission_wait_seconds', 'Time spent in an admission queue before being admitted or shed', ('limiter',))
+EXPORT_ROWS = REGISTRY.counter(
+    'export_rows_total', 'Rows streamed by /export by kind and format', ('kind', 'format'))
+
+
+def render() -> str:
+    return REGISTRY.render()
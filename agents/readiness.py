@@ -0,0 +1,94 @@
+"""Readiness checks for the agent service, with cached results.
+
+Each dependency has an async check, a timeout and a "slow" threshold. Its
+last result is cached for a short TTL. Probes arriving within the TTL share
+one result, and concurrent probes on an expired entry share one check
+(LRUCache.get_or_load), so a probe every second adds at most one query per
+TTL per pod.
+
+Overall status:
+    ready        every dependency answered within its slow threshold
+    degraded     a required dependency is slow, or an optional one is slow or
+                 failing; still served with 200
+    unavailable  a required dependency failed or timed out; served with 503
+
+The asyncpg pool (HealthDataManager) and agno's PostgresDb session store are
+required, but a slow session store alone only degrades: the fast path and the
+tools do not use it. The model check is optional. Configuration lives in
+agent.py (READINESS_*).
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from cache import LRUCache
+import logs
+
+READY = 'ready'
+DEGRADED = 'degraded'
+UNAVAILABLE = 'unavailable'
+
+
+class Dependency:
+    def __init__(self, name: str, check: Callable[[], Awaitable[Any]], required: bool = True,
+                 ttl_seconds: float = 5.0, timeout_ms: float = 2000, slow_ms: float = 500):
+        self.name = name
+        self.check = check
+        self.required = required
+        self.timeout_ms = timeout_ms
+        self.slow_ms = slow_ms
+        self.results = LRUCache(max_entries=1, ttl_seconds=ttl_seconds)
+
+    async def probe(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        result: Dict[str, Any]
+        try:
+            await asyncio.wait_for(self.check(), self.timeout_ms / 1000)
+            result = {'status': 'ok'}
+        except asyncio.TimeoutError:
+            result = {'status': 'timeout', 'error': f'no answer within {self.timeout_ms:g} ms'}
+        except Exception as exc:
+            result = {'status': 'down', 'error': f'{type(exc).__name__}: {exc}'[:200]}
+        latency_ms = (time.perf_counter() - started) * 1000
+        if result['status'] == 'ok' and latency_ms > self.slow_ms:
+            result['status'] = 'slow'
+        result['latency_ms'] = round(latency_ms, 1)
+        result['checked_at'] = time.time()
+        return result
+
+    async def result(self) -> Dict[str, Any]:
+        return await self.results.get_or_load(self.name, self.probe)
+
+
+class Readiness:
+    def __init__(self, dependencies: List[Dependency]):
+        self.dependencies = dependencies
+        self.last: Dict[str, Any] = {'status': 'unknown'}
+
+    def invalidate(self):
+        """Drop the cached results, so the next probe checks every dependency again"""
+        for dependency in self.dependencies:
+            dependency.results.clear()
+
+    async def check(self) -> Dict[str, Any]:
+        """Cached per-dependency results and the overall status"""
+        results = await asyncio.gather(*(dependency.result() for dependency in self.dependencies))
+        status = READY
+        for dependency, result in zip(self.dependencies, results):
+            if result['status'] == 'ok':
+                continue
+            if dependency.required and result['status'] != 'slow':
+                status = UNAVAILABLE
+                break
+            status = DEGRADED
+        if status != self.last['status']:
+            log = logs.logger.info if status == READY else logs.logger.warning
+            log("readiness changed", extra={'status': status, 'previous': self.last['status']})
+        self.last = {
+            'status': status,
+            'dependencies': {
+                dependency.name: {**result, 'required': dependency.required}
+                for dependency, result in zip(self.dependencies, results)
+            },
+        }
+        return self.last
@@ -0,0 +1,54 @@
+"""Compact JSON for tool results.
+
+Tool output is read by the model, not by people, so it is emitted without
+indentation or spaces. Decimal, datetime/date/time, UUID and NumPy values
+are encoded directly, so callers no longer need a pre-pass over their
+results. orjson is used when installed; otherwise the stdlib encoder.
+"""
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    if np is not None and isinstance(obj, np.generic):
+        return obj.item()
+    if np is not None and isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+_stdlib_encode = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False, default=_default).encode
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj: Any) -> str:
+        """Serialize a tool result to compact JSON"""
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS).decode()
+else:
+    def dumps(obj: Any) -> str:
+        """Serialize a tool result to compact JSON"""
+        return _stdlib_encode(obj)
+
+ENCODER = 'orjson' if orjson is not None else 'json'
@@ -0,0 +1,25 @@
+"""agno session store that keeps only the most recent runs of each session.
+
+Imported by agent.build_agent_os in the background agent load, so that
+SQLAlchemy/psycopg are not imported at startup.
+"""
+from agno.db.postgres import PostgresDb
+
+
+class BoundedPostgresDb(PostgresDb):
+    """PostgresDb that trims a session to its last keep_runs runs whenever agno saves it
+
+    agno reads and rewrites the whole session row on every run. Trimming on
+    save bounds that row within a single long conversation, between the
+    periodic passes of session_history.prune().
+    """
+
+    def __init__(self, *args, keep_runs: int = 0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.keep_runs = keep_runs
+
+    def upsert_session(self, session, deserialize=True):
+        runs = getattr(session, 'runs', None)
+        if self.keep_runs > 0 and runs and len(runs) > self.keep_runs:
+            session.runs = runs[-self.keep_runs:]
+        return super().upsert_session(session, deserialize=deserialize)
@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+
+import admission
+from admission import Limiter, Rejected, TokenBucket, parse_limits
+
+
+async def hold(limiter, key, release):
+    async with limiter.slot(key):
+        await release.wait()
+
+
+async def attempt(limiter, key):
+    try:
+        async with limiter.slot(key):
+            return 'ok'
+    except Rejected as exc:
+        return exc.reason
+
+
+def test_parse_limits():
+    assert parse_limits('concurrent=32, per_user=2,,rate=0.5') == {'concurrent': 32.0, 'per_user': 2.0, 'rate': 0.5}
+    with pytest.raises(ValueError, match='unknown admission limit'):
+        parse_limits('burst=1,bogus=2')
+
+
+def test_retry_after_header_rounds_up_to_a_second():
+    assert Rejected('agui', 'rate', 0.2).retry_after_header() == '1'
+    assert Rejected('agui', 'rate', 2.1).retry_after_header() == '3'
+
+
+def test_token_bucket_refills_and_refunds():
+    bucket = TokenBucket(rate=2, burst=2)
+    now = bucket.updated
+    assert bucket.take(now) == 0 and bucket.take(now) == 0
+    assert bucket.take(now) == pytest.approx(0.5)
+    assert bucket.take(now + 0.5) == 0
+    bucket.refund()
+    bucket.refund()
+    assert bucket.tokens == 2
+
+
+def test_rate_limit_rejects_past_burst():
+    async def scenario():
+        limiter = Limiter('t', rate=0.1, burst=2)
+        return [await attempt(limiter, 'u') for _ in range(3)] + [await attempt(limiter, 'other')]
+
+    assert asyncio.run(scenario()) == ['ok', 'ok', 'rate', 'ok']
+
+
+def test_waiters_are_admitted_in_order_as_slots_free():
+    async def scenario():
+        limiter = Limiter('t', concurrent=1, queue=2, wait_ms=1000)
+        release, order = asyncio.Event(), []
+
+        async def waiter(name):
+            async with limiter.slot(name):
+                order.append(name)
+
+        holder = asyncio.create_task(hold(limiter, 'a', release))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(waiter(name)) for name in ('b', 'c')]
+        await asyncio.sleep(0)
+        assert limiter.queue_depth == 2
+        assert await attempt(limiter, 'd') == 'queue_full'
+        release.set()
+        await asyncio.gather(holder, *waiters)
+        return order, limiter.stats()
+
+    order, stats = asyncio.run(scenario())
+    assert order == ['b', 'c']
+    assert stats['active'] == 0 and stats['queue_depth'] == 0
+    assert stats['admitted'] == 3 and stats['queued'] == 2
+    assert stats['rejected'] == {'rate': 0, 'queue_full': 1, 'timeout': 0}
+
+
+def test_per_user_limit_does_not_block_other_waiters():
+    async def scenario():
+        limiter = Limiter('t', concurrent=2, per_user=1, queue=4, wait_ms=1000)
+        release = asyncio.Event()
+        first = asyncio.create_task(hold(limiter, 'a', release))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(hold(limiter, 'a', release))
+        await asyncio.sleep(0)
+        result = await asyncio.wait_for(attempt(limiter, 'b'), 1)
+        release.set()
+        await asyncio.gather(first, second)
+        return result
+
+    assert asyncio.run(scenario()) == 'ok'
+
+
+def test_queue_full_refunds_the_rate_token():
+    async def scenario():
+        limiter = Limiter('t', per_user=1, rate=0.1, burst=3, queue=0)
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(limiter, 'u', release))
+        await asyncio.sleep(0)
+        shed = [await attempt(limiter, 'u') for _ in range(4)]
+        tokens = limiter._keys['u'].bucket.tokens
+        release.set()
+        await holder
+        return shed, tokens, await attempt(limiter, 'u')
+
+    shed, tokens, after = asyncio.run(scenario())
+    assert shed == ['queue_full'] * 4
+    assert tokens == pytest.approx(2, abs=0.01)
+    assert after == 'ok'
+
+
+def test_timeout_refunds_the_rate_token_and_leaves_the_queue():
+    async def scenario():
+        limiter = Limiter('t', per_user=1, rate=0.1, burst=2, queue=4, wait_ms=20)
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(limiter, 'u', release))
+        await asyncio.sleep(0)
+        with pytest.raises(Rejected) as rejected:
+            await limiter.acquire('u')
+        state = limiter._keys['u']
+        result = (rejected.value.reason, state.bucket.tokens, state.waiting, limiter.queue_depth)
+        release.set()
+        await holder
+        return result
+
+    reason, tokens, waiting, depth = asyncio.run(scenario())
+    assert reason == 'timeout'
+    assert tokens == pytest.approx(1, abs=0.01)
+    assert (waiting, depth) == (0, 0)
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        limiter = Limiter('t', concurrent=1, queue=4)
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(limiter, 'a', release))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(limiter.acquire('b'))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        depth = limiter.queue_depth
+        release.set()
+        await holder
+        return depth, limiter.active
+
+    assert asyncio.run(scenario()) == (0, 0)
+
+
+def test_idle_keys_are_forgotten(monkeypatch):
+    monkeypatch.setattr(admission, 'MAX_TRACKED_KEYS', 3)
+
+    async def scenario():
+        limiter = Limiter('t')
+        for key in range(5):
+            await attempt(limiter, key)
+        return len(limiter._keys)
+
+    assert asyncio.run(scenario()) <= 3
@@ -0,0 +1,48 @@
+import json
+
+import numpy as np
+
+import analytics
+
+
+def series(days=90, per_day=24, start=120.0, rise_per_week=0.0):
+    now = 1_800_000_000.0
+    glucose_t = np.arange(now - days * 86400, now, 86400 / per_day)
+    weeks = (glucose_t - glucose_t[0]) / (7 * 86400)
+    meal_t = np.arange(now - days * 86400 + 3600, now, 86400 / 3)
+    mood_t = np.arange(now - days * 86400, now, 86400)
+    return {
+        'now': now,
+        'glucose_t': glucose_t,
+        'glucose_v': start + rise_per_week * weeks + 20 * np.sin(glucose_t / 7200),
+        'meal_t': meal_t,
+        'meal_gi': np.array(['medium'] * len(meal_t)),
+        'mood_t': mood_t,
+        'mood_score': np.full(len(mood_t), 4.0),
+        'stress': np.linspace(2, 8, len(mood_t)),
+        'truncated': False,
+    }
+
+
+def test_glucose_slope_per_week():
+    trends = analytics.compute(series(rise_per_week=3.0))
+    assert abs(trends['glucose_slope_per_week'] - 3.0) < 0.2
+
+
+def test_glucose_slope_needs_a_day_of_readings():
+    t = np.array([0.0, 3600.0])
+    assert analytics.glucose_slope(t, np.array([100.0, 140.0])) is None
+
+
+def test_headline_keeps_only_the_answer_figures():
+    trends = analytics.compute(series())
+    headline = analytics.headline(trends)
+    assert set(headline) == {'glucose', 'glucose_slope_per_week', 'post_meal_excursion', 'stress_vs_glucose'}
+    assert set(headline['glucose']) == {'30d', '90d'}
+    assert set(headline['glucose']['30d']) == set(analytics.HEADLINE_FIELDS)
+    assert headline['glucose']['30d']['mean'] == trends['windows']['30d']['glucose']['mean']
+    assert len(json.dumps(headline)) * 4 < len(json.dumps(trends, default=str))
+
+
+def test_headline_passes_skipped_analytics_through():
+    assert analytics.headline({'skipped': 'exceeded 500 ms budget'}) == {'skipped': 'exceeded 500 ms budget'}
@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from cache import LRUCache
+
+
+class Loader:
+    def __init__(self, delay=0.02):
+        self.calls = 0
+        self.delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {'load': self.calls}
+
+
+def test_lru_eviction_and_counters():
+    cache = LRUCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions']) == (3, 1, 1)
+
+
+def test_entries_expire_after_ttl():
+    cache = LRUCache(ttl_seconds=0)
+    cache.set('a', 1)
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_update_applies_in_place():
+    cache = LRUCache()
+    cache.set('a', [1])
+    cache.update('a', lambda rows: rows.insert(0, 0))
+    cache.update('missing', lambda rows: rows.insert(0, 0))
+    assert cache.get('a') == [0, 1]
+    assert cache.get('missing') is None
+
+
+def test_concurrent_misses_share_one_load():
+    async def scenario():
+        cache, loader = LRUCache(), Loader()
+        results = await asyncio.gather(*(cache.get_or_load('k', loader) for _ in range(5)))
+        return results, loader.calls, cache.get('k')
+
+    results, calls, cached = asyncio.run(scenario())
+    assert calls == 1
+    assert results == [{'load': 1}] * 5
+    assert cached == {'load': 1}
+
+
+def test_failed_load_reaches_every_waiter_and_is_not_cached():
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError('db down')
+
+    async def scenario():
+        cache = LRUCache()
+        results = await asyncio.gather(*(cache.get_or_load('k', failing) for _ in range(3)), return_exceptions=True)
+        return results, cache._inflight, cache.get('k')
+
+    results, inflight, cached = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert inflight == {} and cached is None
+
+
+def test_cancelled_loader_does_not_cancel_waiters():
+    async def scenario():
+        cache, loader = LRUCache(), Loader()
+        first = asyncio.create_task(cache.get_or_load('k', loader))
+        await asyncio.sleep(0.005)
+        waiters = [asyncio.create_task(cache.get_or_load('k', loader)) for _ in range(3)]
+        await asyncio.sleep(0.005)
+        first.cancel()
+        results = await asyncio.gather(*waiters)
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return results, loader.calls, cache._inflight
+
+    results, calls, inflight = asyncio.run(scenario())
+    # The waiters share one fresh load in place of the cancelled one
+    assert results == [{'load': 2}] * 3
+    assert calls == 2
+    assert inflight == {}
+
+
+def test_cancelled_waiter_does_not_cancel_the_load():
+    async def scenario():
+        cache, loader = LRUCache(), Loader()
+        first = asyncio.create_task(cache.get_or_load('k', loader))
+        await asyncio.sleep(0.005)
+        waiter = asyncio.create_task(cache.get_or_load('k', loader))
+        await asyncio.sleep(0.005)
+        waiter.cancel()
+        return await first, waiter.cancelled() or None, loader.calls
+
+    assert asyncio.run(scenario()) == ({'load': 1}, True, 1)
+
+
+@pytest.mark.parametrize('write', [
+    lambda cache: cache.invalidate('k'),
+    lambda cache: cache.update('k', lambda value: None),
+    lambda cache: cache.clear(),
+])
+def test_write_during_load_marks_it_stale(write):
+    async def scenario():
+        cache, loader = LRUCache(), Loader()
+        task = asyncio.create_task(cache.get_or_load('k', loader))
+        await asyncio.sleep(0.005)
+        write(cache)
+        value = await task
+        return value, cache.get('k'), cache._stale_loads
+
+    value, cached, stale = asyncio.run(scenario())
+    # The caller still gets its result, but a load that raced a write is not cached
+    assert value == {'load': 1}
+    assert cached is None
+    assert stale == set()
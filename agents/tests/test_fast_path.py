@@ -0,0 +1,109 @@
+import asyncio
+import json
+
+import pytest
+from ag_ui.core import AssistantMessage, EventType, RunAgentInput, UserMessage
+
+import fast_path
+from fast_path import FastPathMatch, match_message
+
+GLUCOSE_RESULT = {'status': 'normal', 'analysis': 'Glucose is 120 mg/dL.', 'recommendation': 'Keep it up.'}
+MOOD_RESULT = {'insights': 'Mood is good.', 'recommendations': ['Keep moving.', 'Sleep well.']}
+
+
+@pytest.mark.parametrize('text, value', [
+    ('glucose 142', 142),
+    ('My blood sugar is 142 mg/dL', 142),
+    ('bg: 98.5', 98.5),
+    ('142 mg/dl.', 142),
+    ('current glucose reading was 75!', 75),
+])
+def test_glucose_messages(text, value):
+    assert match_message(text) == FastPathMatch('store_glucose_data', {'glucose_value': value})
+
+
+@pytest.mark.parametrize('text', [
+    'glucose 142 after lunch',
+    'glucose 500',
+    'glucose',
+    '142',
+    'what was my glucose 142 days ago?',
+])
+def test_glucose_messages_left_to_the_model(text):
+    assert match_message(text) is None
+
+
+@pytest.mark.parametrize('text, fields', [
+    ('mood good energy 7 stress 3', {'mood': 'good', 'energy': 7, 'stress': 3}),
+    ('stress: 3/10, energy 7; mood: Great.', {'mood': 'great', 'energy': 7, 'stress': 3}),
+    ('ok energy 5 stress 5', {'mood': 'okay', 'energy': 5, 'stress': 5}),
+])
+def test_mood_messages(text, fields):
+    assert match_message(text) == FastPathMatch('store_mood_data', fields)
+
+
+@pytest.mark.parametrize('text', [
+    'mood good energy 7',
+    'mood good energy 7 stress 11',
+    'mood good mood bad energy 7 stress 3',
+    'mood good energy 7 stress 3 but tired',
+    'feeling good energy 7 stress 3',
+])
+def test_mood_messages_left_to_the_model(text):
+    assert match_message(text) is None
+
+
+def run_input(*messages):
+    return RunAgentInput(thread_id='t', run_id='r', state={}, messages=list(messages), tools=[], context=[],
+                         forwarded_props={})
+
+
+def test_only_the_latest_plain_user_message_is_matched():
+    user = UserMessage(id='1', role='user', content='glucose 120')
+    assistant = AssistantMessage(id='2', role='assistant', content='glucose 120')
+    assert fast_path.match_run_input(run_input(user)).tool == 'store_glucose_data'
+    assert fast_path.match_run_input(run_input(user, assistant)) is None
+    assert fast_path.match_run_input(run_input()) is None
+
+
+def test_acknowledgement_from_tool_results():
+    glucose = FastPathMatch('store_glucose_data', {'glucose_value': 120})
+    mood = FastPathMatch('store_mood_data', {'mood': 'good', 'energy': 7, 'stress': 3})
+    assert fast_path.acknowledgement(glucose, GLUCOSE_RESULT) == "Logged. Glucose is 120 mg/dL. Keep it up."
+    assert fast_path.acknowledgement(mood, MOOD_RESULT) == "Logged. Mood is good. Keep moving. Sleep well."
+
+
+def test_acknowledgement_passes_on_tool_budget_errors():
+    glucose = FastPathMatch('store_glucose_data', {'glucose_value': 120})
+    result = {'status': 'error', 'error': 'store_glucose_data timed out after 10000 ms', 'note': 'Do not retry.'}
+    assert fast_path.acknowledgement(glucose, result) == "store_glucose_data timed out after 10000 ms. Do not retry."
+
+
+def stream(tool_result):
+    match = FastPathMatch('store_glucose_data', {'glucose_value': 120})
+
+    async def store_glucose_data(glucose_value):
+        return json.dumps(tool_result)
+
+    async def collect():
+        tools = {'store_glucose_data': store_glucose_data}
+        return [event async for event in fast_path.run(run_input(), match, tools)]
+
+    return asyncio.run(collect())
+
+
+def test_run_streams_the_model_path_event_order():
+    events = stream(GLUCOSE_RESULT)
+    assert [event.type for event in events] == [
+        EventType.RUN_STARTED, EventType.TOOL_CALL_START, EventType.TOOL_CALL_ARGS, EventType.TOOL_CALL_END,
+        EventType.TOOL_CALL_RESULT, EventType.TEXT_MESSAGE_START, EventType.TEXT_MESSAGE_CONTENT,
+        EventType.TEXT_MESSAGE_END, EventType.RUN_FINISHED,
+    ]
+    assert json.loads(events[2].delta) == {'glucose_value': 120}
+    assert events[6].delta.startswith("Logged.")
+
+
+def test_run_finishes_normally_on_a_tool_budget_error():
+    events = stream({'status': 'error', 'error': 'store_glucose_data was not run', 'note': 'Nothing was saved.'})
+    assert events[-1].type == EventType.RUN_FINISHED
+    assert events[6].delta == "store_glucose_data was not run. Nothing was saved."
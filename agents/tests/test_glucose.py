@@ -0,0 +1,111 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import glucose
+
+
+async def _lines(text):
+    for line in text.split('\n'):
+        yield line
+
+
+def parse(text):
+    async def collect():
+        return [row async for row in glucose.parse_csv(_lines(text))]
+    return asyncio.run(collect())
+
+
+def load(rows, fail_on_copy=None):
+    """ingest() against a fake connection; returns (summary, stored rows)"""
+    stored, copies = [], [0]
+
+    class Conn:
+        async def copy_records_to_table(self, table, records, columns):
+            copies[0] += 1
+            if copies[0] == fail_on_copy:
+                raise ConnectionError("connection lost")
+            stored.extend(records)
+
+    @asynccontextmanager
+    async def get_connection():
+        yield Conn()
+
+    async def source():
+        for row in rows:
+            yield row
+
+    summary = asyncio.run(glucose.ingest(get_connection, 'user', source(), chunk_rows=2))
+    return summary, stored
+
+
+def test_parse_csv_maps_header_names():
+    rows = parse("Timestamp,Glucose Value (mg/dL)\n2026-01-01T08:00:00,120\n\n2026-01-01T08:05:00,130")
+    assert rows == [(2, '120', '2026-01-01T08:00:00'), (4, '130', '2026-01-01T08:05:00')]
+
+
+def test_parse_csv_multi_line_quoted_field():
+    rows = parse('value,timestamp,note\n120,2026-01-01T08:00:00,"before\nbreakfast, ""fasted"""\n'
+                 '130,2026-01-01T08:05:00,ok')
+    assert rows == [(2, '120', '2026-01-01T08:00:00'), (4, '130', '2026-01-01T08:05:00')]
+
+
+def test_parse_csv_stray_quote_in_unquoted_field_is_data():
+    good = ''.join(f'\n{100 + i},2026-01-01T09:{i:02d}:00' for i in range(10))
+    rows = parse('value,timestamp\n120,2026-01-01T08:00:00\n1"30,2026-01-01T08:05:00' + good)
+    assert len(rows) == 12
+    assert rows[1] == (3, '1"30', '2026-01-01T08:05:00')
+    assert [line_no for line_no, _, _ in rows[2:]] == list(range(4, 14))
+
+
+def test_parse_csv_rejects_quote_left_open_at_eof():
+    rows = parse('value,timestamp\n120,2026-01-01T08:00:00\n"130,2026-01-01T08:05:00\n140,2026-01-01T08:10:00')
+    assert rows == [
+        (2, '120', '2026-01-01T08:00:00'),
+        (3, glucose.MALFORMED_CSV, None),
+        (4, '140', '2026-01-01T08:10:00'),
+    ]
+
+
+def test_parse_csv_rejects_record_open_past_max_lines(monkeypatch):
+    monkeypatch.setattr(glucose, 'MAX_RECORD_LINES', 3)
+    rows = parse('value,timestamp\n"120,2026-01-01T08:00:00\n130,2026-01-01T08:05:00\n'
+                 '140,2026-01-01T08:10:00\n150,2026-01-01T08:15:00')
+    assert rows == [
+        (2, glucose.MALFORMED_CSV, None),
+        (3, '130', '2026-01-01T08:05:00'),
+        (4, '140', '2026-01-01T08:10:00'),
+        (5, '150', '2026-01-01T08:15:00'),
+    ]
+
+
+def test_ingest_reports_malformed_and_invalid_rows():
+    text = ('value,timestamp\n120,2026-01-01T08:00:00\n1"30,2026-01-01T08:05:00\n'
+            '500,2026-01-01T08:10:00\n"70,2026-01-01T08:15:00\n200,2026-01-01T08:20:00')
+
+    async def collect():
+        return [row async for row in glucose.parse_csv(_lines(text))]
+
+    summary, stored = load(asyncio.run(collect()))
+    result = summary.to_dict()
+    assert (result['accepted'], result['rejected']) == (2, 3)
+    assert result['by_status'] == {'low': 0, 'normal': 1, 'high': 1}
+    assert any(error.startswith('line 5: malformed CSV record') for error in result['errors'])
+    assert result['error'] is None
+    assert len(stored) == 2
+
+
+def test_parse_ndjson_flags_bad_lines():
+    async def collect():
+        return [row async for row in glucose.parse_ndjson(_lines('{"sgv": 110, "dateString": "2026-01-01"}\n[1]\n{bad'))]
+
+    assert asyncio.run(collect()) == [(1, 110, '2026-01-01'), (2, None, None), (3, None, None)]
+
+
+def test_ingest_returns_partial_summary_when_a_copy_fails():
+    rows = [(line_no, 100 + line_no, f'2026-01-01T08:{line_no:02d}:00') for line_no in range(1, 6)]
+    summary, stored = load(rows, fail_on_copy=2)
+    result = summary.to_dict()
+    assert result['accepted'] == 2
+    assert result['error'] == 'ConnectionError: connection lost'
+    assert result['not_stored'] == 2
+    assert len(stored) == 2
@@ -0,0 +1,99 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import agent
+
+
+class StalledConnection:
+    """Commits each insert at once, then holds the flush open until released"""
+
+    def __init__(self):
+        self.rows = []
+        self.committed = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def execute(self, query, *args):
+        self.rows.append(args)
+        self.committed.set()
+        await self.release.wait()
+
+
+def manager(conn):
+    db = agent.HealthDataManager('postgresql://unused/db')
+
+    @asynccontextmanager
+    async def get_connection():
+        yield conn
+
+    db.writes.get_connection = get_connection
+    return db
+
+
+async def cancel_after_commit(db, conn, write):
+    task = asyncio.create_task(write)
+    await conn.committed.wait()
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    conn.release.set()
+    await db.writes.drain()
+
+
+def test_cancelled_glucose_insert_drops_the_cached_summary():
+    async def scenario():
+        conn = StalledConnection()
+        db = manager(conn)
+        db.summary_cache.set('user', {'glucose_readings': [], 'mood_entries': [], 'recent_meals': []})
+        await cancel_after_commit(db, conn, db.store_glucose_reading('user', 120))
+        return db, conn
+
+    db, conn = asyncio.run(scenario())
+    assert len(conn.rows) == 1
+    assert db.summary_cache.get('user') is None
+
+
+def test_cancelled_meal_insert_drops_the_nutrition_index():
+    meal = {'type': 'lunch', 'name': 'salad', 'calories': 300, 'carbs': 20, 'protein': 10, 'fat': 8,
+            'glycemic_impact': 'low'}
+
+    async def scenario():
+        conn = StalledConnection()
+        db = manager(conn)
+        db.summary_cache.set('user', {'glucose_readings': [], 'mood_entries': [], 'recent_meals': []})
+        db.nutrition.hot.set('user', object())
+        await cancel_after_commit(db, conn, db.store_meal_entry('user', meal))
+        return db, conn
+
+    db, conn = asyncio.run(scenario())
+    assert len(conn.rows) == 1
+    assert db.summary_cache.get('user') is None
+    assert db.nutrition.hot.get('user') is None
+
+
+def test_health_insights_reads_one_at_a_time(monkeypatch):
+    in_flight, peak = [0], [0]
+
+    def read(result):
+        async def method(*args, **kwargs):
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+            await asyncio.sleep(0.01)
+            in_flight[0] -= 1
+            return result
+        return method
+
+    db = agent.HealthDataManager('postgresql://unused/db')
+    empty = {'glucose_readings': [], 'mood_entries': [], 'recent_meals': [], 'summary_generated_at': None}
+    monkeypatch.setattr(db, 'get_user_health_summary', read(empty))
+    monkeypatch.setattr(db, 'get_rolling_averages', read({}))
+    monkeypatch.setattr(db, 'get_trend_analytics', read({'skipped': 'no data'}))
+    monkeypatch.setattr(agent, 'health_db', db)
+
+    async def scenario():
+        agent.current_user_id.set('user')
+        return await agent.get_health_insights()
+
+    asyncio.run(scenario())
+    assert peak[0] == 1
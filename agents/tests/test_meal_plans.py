@@ -0,0 +1,93 @@
+import pytest
+
+import meal_plans
+from meal_plans import MealCatalog, targets
+
+
+def meal(name, slot, calories, carbs, protein, glycemic='low', vegetarian=False):
+    return {'name': name, 'slot': slot, 'calories': calories, 'carbs': carbs, 'protein': protein, 'fat': 10,
+            'fiber': 3, 'glycemic_impact': glycemic, 'vegetarian': vegetarian}
+
+
+MEALS = [
+    meal('Eggs', 'breakfast', 300, 5, 25),
+    meal('Pancakes', 'breakfast', 500, 80, 8, 'high', vegetarian=True),
+    meal('Oatmeal', 'breakfast', 350, 50, 10, 'medium', vegetarian=True),
+    meal('Chicken Salad', 'lunch', 450, 15, 40),
+    meal('Bean Bowl', 'lunch', 600, 70, 20, 'medium', vegetarian=True),
+    meal('Salmon', 'dinner', 550, 20, 45),
+    meal('Lentil Curry', 'dinner', 600, 60, 25, 'medium', vegetarian=True),
+    meal('Nuts', 'snack', 200, 8, 6, vegetarian=True),
+    meal('Apple', 'snack', 100, 25, 0, vegetarian=True),
+]
+
+
+@pytest.fixture
+def catalog():
+    return MealCatalog(MEALS)
+
+
+def test_index_filters_by_slot_preference_and_glycemic_cap(catalog):
+    names = lambda key: {catalog.names[row] for row in catalog.index[key][0]}
+    assert names(('breakfast', 'balanced', 2)) == {'Eggs', 'Pancakes', 'Oatmeal'}
+    assert names(('breakfast', 'balanced', 0)) == {'Eggs'}
+    assert names(('breakfast', 'vegetarian', 1)) == {'Oatmeal'}
+    assert names(('lunch', 'low-carb', 2)) == {'Chicken Salad'}
+    assert names(('dinner', 'high-protein', 2)) == {'Salmon'}
+
+
+def test_plan_picks_the_meal_closest_to_each_slot_share(catalog):
+    day, = catalog.plan('balanced', 1, calories=2000, carbs=200, max_glycemic='medium')
+    assert day['breakfast']['name'] == 'Oatmeal'
+    assert day['lunch']['name'] == 'Bean Bowl'
+    assert day['dinner']['name'] == 'Lentil Curry'
+    assert day['breakfast']['calories'] == 350 and isinstance(day['breakfast']['calories'], int)
+    assert day['snacks'] and len(set(day['snacks'])) == len(day['snacks'])
+    chosen = [day[slot]['calories'] for slot in meal_plans.MAIN_SLOTS]
+    snacks = sum(m['calories'] for m in MEALS if m['name'] in day['snacks'])
+    assert day['totals']['calories'] == sum(chosen) + snacks
+
+
+def test_glycemic_cap_and_preference_are_relaxed_before_a_slot_is_left_empty(catalog):
+    day, = catalog.plan('vegetarian', 1, calories=2000, carbs=200, max_glycemic='low')
+    # No vegetarian main is low-glycemic: the cap is relaxed first, keeping the preference
+    assert day['breakfast']['name'] in {'Pancakes', 'Oatmeal'}
+    day, = catalog.plan('high-protein', 1, calories=2000, carbs=200, max_glycemic='low')
+    assert day['lunch']['name'] == 'Chicken Salad'
+
+
+def test_repeats_are_penalized_across_days(catalog):
+    days = catalog.plan('balanced', 2, calories=2000, carbs=200, max_glycemic='medium')
+    assert days[0]['breakfast']['name'] != days[1]['breakfast']['name']
+
+
+def test_unknown_preference_falls_back_to_balanced(catalog):
+    assert catalog.plan('keto', 1, 2000, 200) == catalog.plan('balanced', 1, 2000, 200)
+
+
+def test_missing_slot_is_an_error():
+    with pytest.raises(ValueError, match='no snack entries'):
+        MealCatalog(MEALS[:-2]).plan('balanced', 1, 2000, 200)
+
+
+def test_shipped_catalog_plans_a_week():
+    catalog = MealCatalog.load()
+    for preference in meal_plans.PREFERENCES:
+        assert len(catalog.plan(preference, 7, 1800, 150, 'low')) == 7
+
+
+def test_targets_from_logged_intake():
+    intake = {'days_logged': 10, 'calories_per_day': 4000, 'carbs_per_day': 500}
+    result = targets(intake, 'balanced', 'normal')
+    assert result['calories'] == meal_plans.CALORIE_RANGE[1]
+    assert result['carbs'] == round(3000 * meal_plans.MAX_CARB_SHARE / 4)
+    assert result['max_glycemic_impact'] == 'medium'
+    assert result['basis'] == 'average of 10 logged days'
+
+
+def test_targets_default_and_high_glucose():
+    result = targets({'days_logged': 1, 'calories_per_day': 0, 'carbs_per_day': 0}, 'balanced', 'high')
+    assert result['calories'] == meal_plans.DEFAULT_CALORIES
+    assert result['carbs'] == meal_plans.LOW_CARB_GRAMS
+    assert result['max_glycemic_impact'] == 'low'
+    assert targets({'days_logged': 0}, 'balanced', 'low')['max_glycemic_impact'] == 'high'
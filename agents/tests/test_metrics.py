@@ -0,0 +1,87 @@
+import asyncio
+import os
+import time
+
+from metrics import Registry, SharedMetrics
+
+
+def registry(requests=0, seconds=(), pool=None):
+    reg = Registry()
+    counter = reg.counter('requests_total', 'Requests', ('method', 'path'))
+    if requests:
+        counter.inc('GET', '/health', amount=requests)
+    histogram = reg.histogram('latency_seconds', 'Latency', ('tool',), buckets=(0.1, 1))
+    for value in seconds:
+        histogram.observe(value, 'insights')
+    reg.gauge('pool_in_use', 'Connections in use', lambda: pool)
+    return reg
+
+
+def test_counter_render_and_label_escaping():
+    reg = Registry()
+    counter = reg.counter('calls_total', 'Calls', ('path',))
+    counter.inc('/a"b\\c\n')
+    counter.inc('/a"b\\c\n', amount=1.5)
+    assert counter.value('/a"b\\c\n') == 2.5
+    assert reg.render() == ('# HELP calls_total Calls\n# TYPE calls_total counter\n'
+                            'calls_total{path="/a\\"b\\\\c\\n"} 2.5\n')
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    reg = registry(seconds=(0.05, 0.1, 0.5, 3))
+    lines = [line for line in reg.render().splitlines() if line.startswith('latency_seconds')]
+    assert lines == [
+        'latency_seconds_bucket{tool="insights",le="0.1"} 2',
+        'latency_seconds_bucket{tool="insights",le="1"} 3',
+        'latency_seconds_bucket{tool="insights",le="+Inf"} 4',
+        'latency_seconds_sum{tool="insights"} 3.65',
+        'latency_seconds_count{tool="insights"} 4',
+    ]
+
+
+def test_histogram_time_decorator_labels_with_the_function_name():
+    reg = Registry()
+    histogram = reg.histogram('db_seconds', 'DB time', ('method',))
+
+    @histogram.time()
+    async def fetch_summary():
+        return 'done'
+
+    assert asyncio.run(fetch_summary()) == 'done'
+    assert fetch_summary.__name__ == 'fetch_summary'
+    assert histogram.count('fetch_summary') == 1
+
+
+def test_gauges_skip_missing_values_and_accept_label_dicts():
+    reg = Registry()
+    reg.gauge('cache_entries', 'Entries', lambda: {'summary': 3, ('nutrition',): 1, 'export': None}, ('cache',))
+    reg.gauge('pool_in_use', 'In use', lambda: None)
+    lines = [line for line in reg.render().splitlines() if not line.startswith('#')]
+    assert lines == ['cache_entries{cache="summary"} 3', 'cache_entries{cache="nutrition"} 1']
+
+
+def test_shared_metrics_sum_counters_and_keep_gauges_per_worker(tmp_path):
+    first = SharedMetrics(str(tmp_path), registry(requests=2, seconds=(0.05,), pool=3))
+    second = SharedMetrics(str(tmp_path), registry(requests=5, seconds=(0.5,), pool=1))
+    first.worker, second.worker = '100', '200'
+    second.write()
+    text = first.render()
+    assert 'requests_total{method="GET",path="/health"} 7' in text
+    assert 'latency_seconds_count{tool="insights"} 2' in text
+    assert 'latency_seconds_bucket{tool="insights",le="0.1"} 1' in text
+    assert 'pool_in_use{worker="100"} 3' in text
+    assert 'pool_in_use{worker="200"} 1' in text
+
+
+def test_exited_and_stale_workers_keep_counters_but_drop_gauges(tmp_path):
+    live = SharedMetrics(str(tmp_path), registry(requests=1, pool=2))
+    exited = SharedMetrics(str(tmp_path), registry(requests=4, pool=9))
+    stale = SharedMetrics(str(tmp_path), registry(requests=10, pool=7))
+    live.worker, exited.worker, stale.worker = '1', '2', '3'
+    asyncio.run(exited.stop())
+    stale.write()
+    old = time.time() - 3 * stale.interval - 1
+    os.utime(stale.path, (old, old))
+    text = live.render()
+    assert 'requests_total{method="GET",path="/health"} 15' in text
+    assert [line for line in text.splitlines() if line.startswith('pool_in_use')] == ['pool_in_use{worker="1"} 2']
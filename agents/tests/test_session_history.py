@@ -0,0 +1,86 @@
+from datetime import datetime
+
+from ag_ui.core import AssistantMessage, FunctionCall, RunAgentInput, ToolCall, ToolMessage, UserMessage
+
+import session_history
+from session_history import bound_run_input, compact, health_memory, window
+
+
+def turn(index, words='log glucose'):
+    call = ToolCall(id=f'call-{index}', type='function',
+                    function=FunctionCall(name='store_glucose_data', arguments='{"glucose_value": 120}'))
+    return [
+        UserMessage(id=f'u{index}', role='user', content=f'{words} {index}'),
+        AssistantMessage(id=f'a{index}', role='assistant', tool_calls=[call]),
+        ToolMessage(id=f't{index}', role='tool', content='{"stored": true}', tool_call_id=f'call-{index}'),
+        AssistantMessage(id=f'r{index}', role='assistant', content=f'Logged {index}.'),
+    ]
+
+
+def conversation(turns):
+    return [message for index in range(turns) for message in turn(index)]
+
+
+def run_input(messages):
+    return RunAgentInput(thread_id='t', run_id='r', state={}, messages=messages, tools=[], context=[],
+                         forwarded_props={})
+
+
+def test_window_keeps_whole_turns():
+    messages = conversation(5)
+    kept, dropped = window(messages, 2)
+    assert [message.id for message in kept] == [m.id for m in turn(3) + turn(4)]
+    assert dropped == messages[:12]
+    assert window(messages, 5) == (messages, [])
+    assert window(messages, 0) == (messages, [])
+
+
+def test_compact_keeps_the_most_recent_words_within_budget():
+    dropped = conversation(3)
+    assert compact(dropped, 1000) == ('Earlier in this conversation (older turns omitted) the user said: '
+                                      '"log glucose 0"; "log glucose 1"; "log glucose 2"')
+    assert compact(dropped, 30).endswith('"log glucose 1"; "log glucose 2"')
+    assert compact(turn(0)[1:], 1000) is None
+
+
+def test_compact_shortens_long_messages():
+    long = [UserMessage(id='u', role='user', content='word  ' * 100)]
+    said = compact(long, 1000)
+    assert len(said.split('"')[1]) == session_history.MESSAGE_CHARS
+    assert said.split('"')[1].endswith('…')
+
+
+def test_health_memory_line():
+    at = datetime(2026, 3, 1, 8, 30)
+    summary = {
+        'glucose_readings': [{'value': 142.0, 'status': 'normal', 'timestamp': at}],
+        'mood_entries': [],
+        'recent_meals': [{'name': 'Oatmeal', 'type': 'breakfast', 'calories': 300, 'glycemic_impact': 'medium',
+                          'date': at}],
+    }
+    assert health_memory(summary) == ("Health memory: latest glucose 142 mg/dL (normal) at 2026-03-01 08:30; "
+                                      "last meal Oatmeal (breakfast, 300 kcal, medium glycemic impact) "
+                                      "at 2026-03-01 08:30.")
+    assert health_memory({'glucose_readings': [], 'mood_entries': [], 'recent_meals': []}) is None
+
+
+def test_short_history_is_left_alone():
+    original = run_input(conversation(2))
+    assert bound_run_input(original, max_turns=4, compact_chars=600) is original
+
+
+def test_long_history_is_windowed_behind_a_context_message():
+    original = run_input(conversation(6))
+    bounded = bound_run_input(original, max_turns=2, compact_chars=600, memory='Health memory: x.')
+    context, *kept = bounded.messages
+    assert context.role == 'user' and context.id == 'context-r'
+    assert context.content.startswith('Context for this conversation, not a new request.\n')
+    assert '"log glucose 3"' in context.content and context.content.endswith('Health memory: x.')
+    assert [message.id for message in kept] == [m.id for m in turn(4) + turn(5)]
+    assert len(original.messages) == 24
+
+
+def test_memory_alone_adds_a_context_message():
+    bounded = bound_run_input(run_input(conversation(1)), max_turns=4, compact_chars=0, memory='Health memory: x.')
+    assert len(bounded.messages) == 5
+    assert bounded.messages[0].content.endswith('\nHealth memory: x.')
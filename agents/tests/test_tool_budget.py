@@ -0,0 +1,74 @@
+import asyncio
+import json
+
+import pytest
+
+from admission import Limiter
+from tool_budget import ToolBudget, parse_timeouts
+
+
+def test_parse_timeouts():
+    assert parse_timeouts('store_glucose_batch=60000, get_health_insights=2500,') == {
+        'store_glucose_batch': 60000.0, 'get_health_insights': 2500.0}
+
+
+def call(budget, fn, *args):
+    return asyncio.run(budget(fn)(*args))
+
+
+def test_result_is_returned_and_timed():
+    budget = ToolBudget()
+
+    async def tool(value):
+        """Docstring agno reads"""
+        return json.dumps({'value': value})
+
+    assert call(budget, tool, 3) == '{"value": 3}'
+    assert budget(tool).__doc__ == "Docstring agno reads"
+    assert budget.stats()['tool']['calls'] == 1
+
+
+def test_timeout_returns_a_structured_error():
+    budget = ToolBudget(default_timeout_ms=10, timeouts_ms={'fast': 1000})
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    result = json.loads(call(budget, slow))
+    assert result['status'] == 'error'
+    assert result['error'] == 'slow timed out after 10 ms'
+    assert result['note']
+    assert budget.stats()['slow']['timeouts'] == 1
+    assert budget.timeout_ms('fast') == 1000
+
+
+def test_timeout_raised_inside_the_tool_is_an_error():
+    budget = ToolBudget(default_timeout_ms=1000)
+
+    async def pool_timeout():
+        raise TimeoutError
+
+    with pytest.raises(TimeoutError):
+        call(budget, pool_timeout)
+    assert budget.stats()['pool_timeout']['errors'] == 1
+
+
+def test_rejected_call_never_runs():
+    ran = []
+    limiter = Limiter('tools', concurrent=1, queue=0)
+    budget = ToolBudget(admission=limiter, admission_key=lambda: 'user')
+
+    async def tool():
+        ran.append(True)
+        return '{}'
+
+    async def scenario():
+        await limiter.acquire('other')
+        return await budget(tool)()
+
+    result = json.loads(asyncio.run(scenario()))
+    assert not ran
+    assert result['status'] == 'error'
+    assert 'queue_full' in result['error']
+    assert result['note'].startswith('Nothing was saved.')
+    assert budget.stats()['tool']['rejected'] == 1
@@ -0,0 +1,157 @@
+"""Per-tool time budget, timing and outcome counters for the agent's tools.
+
+agno already runs the tool calls of one model turn concurrently: its
+arun_function_calls gathers the async tools. What a turn still lacked was
+a bound on any single call. A tool wrapped by ToolBudget is cancelled once
+its budget runs out. The model then gets a structured timeout result
+instead of the whole AG-UI stream waiting on one slow query. Every call is
+timed. The duration and outcome (ok/error/timeout/cancelled/rejected) are
+logged as the "tool call" line, aggregated per tool for /health and
+recorded as the tool_calls_total / tool_call_duration_seconds series in /metrics.
+
+With an admission Limiter (admission.py), each call first takes a slot for
+the current user. A call that is shed gets a structured "busy" result
+(outcome rejected) and never touches the database. Time spent waiting for
+a slot counts against the call's budget.
+
+A cancelled store_* call may still commit: the write buffer's flush is
+shared with other callers and is not cancelled with it. The timeout result
+says so, to discourage an immediate retry.
+
+Configuration (environment):
+    TOOL_TIMEOUT_MS=10000                       # default budget per call
+    TOOL_TIMEOUTS=store_glucose_batch=60000     # per-tool overrides, in ms
+"""
+import asyncio
+import functools
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+import logs
+import metrics
+import serialization
+from admission import Limiter, Rejected
+
+# Recent durations kept per tool for the percentiles in stats()
+RECENT_CALLS = 256
+
+
+def parse_timeouts(spec: str) -> Dict[str, float]:
+    """'tool=ms,tool=ms' -> {tool: ms}"""
+    timeouts = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, ms = item.partition('=')
+        timeouts[name.strip()] = float(ms)
+    return timeouts
+
+
+class ToolStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent = deque(maxlen=RECENT_CALLS)
+
+    def record(self, duration_ms: float, outcome: str):
+        self.calls += 1
+        self.errors += outcome == 'error'
+        self.timeouts += outcome == 'timeout'
+        self.cancelled += outcome == 'cancelled'
+        self.rejected += outcome == 'rejected'
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.recent.append(duration_ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        recent = sorted(self.recent)
+
+        def pct(p):
+            return round(recent[min(len(recent) - 1, int(p / 100 * len(recent)))], 1) if recent else None
+
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'cancelled': self.cancelled,
+            'rejected': self.rejected,
+            'avg_ms': round(self.total_ms / self.calls, 1) if self.calls else None,
+            'p50_ms': pct(50),
+            'p95_ms': pct(95),
+            'max_ms': round(self.max_ms, 1),
+        }
+
+
+class ToolBudget:
+    """Decorator that gives each async tool a timeout, an optional admission slot, and records its timing"""
+
+    def __init__(self, default_timeout_ms: float = 10000, timeouts_ms: Dict[str, float] = None,
+                 admission: Optional[Limiter] = None, admission_key: Callable[[], Hashable] = None):
+        self.default_timeout_ms = default_timeout_ms
+        self.timeouts_ms = dict(timeouts_ms or {})
+        self.admission = admission
+        self.admission_key = admission_key
+        self.tools: Dict[str, ToolStats] = {}
+
+    def timeout_ms(self, name: str) -> float:
+        return self.timeouts_ms.get(name, self.default_timeout_ms)
+
+    def __call__(self, fn: Callable[..., Awaitable[str]]) -> Callable[..., Awaitable[str]]:
+        name = fn.__name__
+        stats = self.tools.setdefault(name, ToolStats())
+
+        # functools.wraps keeps the name, docstring and signature agno builds the tool schema from
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs) -> str:
+            timeout_ms = self.timeout_ms(name)
+            started = time.perf_counter()
+            outcome = 'ok'
+            budget = asyncio.timeout(timeout_ms / 1000 if timeout_ms > 0 else None)
+            try:
+                async with budget:
+                    if self.admission is None:
+                        return await fn(*args, **kwargs)
+                    async with self.admission.slot(self.admission_key()):
+                        return await fn(*args, **kwargs)
+            except Rejected as exc:
+                outcome = 'rejected'
+                return serialization.dumps({
+                    'status': 'error',
+                    'error': f"{name} was not run: too many requests in flight ({exc.reason})",
+                    'note': f"Nothing was saved. Ask the user to try again in {exc.retry_after_header()} s.",
+                })
+            except TimeoutError:
+                if not budget.expired():
+                    # Raised inside the tool (e.g. waiting for a pool connection), not by the budget
+                    outcome = 'error'
+                    raise
+                outcome = 'timeout'
+                return serialization.dumps({
+                    'status': 'error',
+                    'error': f"{name} timed out after {timeout_ms:g} ms",
+                    'note': "The service is slow right now; any data sent may still have been saved. "
+                            "Do not retry immediately.",
+                })
+            except asyncio.CancelledError:
+                # The run itself was cancelled (e.g. the client went away)
+                outcome = 'cancelled'
+                raise
+            except Exception:
+                outcome = 'error'
+                raise
+            finally:
+                duration_ms = (time.perf_counter() - started) * 1000
+                stats.record(duration_ms, outcome)
+                metrics.TOOL_CALLS.inc(name, outcome)
+                metrics.TOOL_SECONDS.observe(duration_ms / 1000, name)
+                log = logs.logger.warning if outcome in ('error', 'timeout', 'rejected') else logs.logger.info
+                log("tool call", extra={'tool': name, 'duration_ms': round(duration_ms, 1), 'outcome': outcome})
+
+        return wrapper
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: stats.to_dict() for name, stats in self.tools.items()}
@@ -0,0 +1,130 @@
+import asyncio
+from typing import Any, Callable, Dict, List, Sequence, Set, Tuple
+
+
+class WriteBuffer:
+    """Coalesces concurrent single-row inserts into one COPY per table.
+
+    When nothing is being written to a table, a row is flushed right away so
+    a lone writer pays no extra latency. While a flush is in flight, rows
+    queued for the same table within `window_ms` (or until `max_batch` rows
+    are waiting) are written together in a single transaction. `insert()` only
+    returns once that transaction has committed, so each caller still gets a
+    durable per-record result. If a batch fails, its rows are retried one by
+    one, so a single bad record only fails its own caller.
+    """
+
+    def __init__(self, get_connection: Callable, window_ms: float = 2.0, max_batch: int = 500):
+        self.get_connection = get_connection
+        self.window = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self._pending: Dict[Tuple[str, Tuple[str, ...]], List[Tuple[Sequence[Any], asyncio.Future]]] = {}
+        self._timers: Dict[Tuple[str, Tuple[str, ...]], asyncio.TimerHandle] = {}
+        self._flushes: Set[asyncio.Task] = set()
+        self._inflight: Dict[Tuple[str, Tuple[str, ...]], int] = {}
+        self.batches = 0
+        self.batched_rows = 0
+        self.retried_rows = 0
+        self.failed_rows = 0
+
+    async def insert(self, table: str, columns: Sequence[str], record: Sequence[Any]):
+        """Queue one row and wait until it has been committed"""
+        loop = asyncio.get_running_loop()
+        key = (table, tuple(columns))
+        future = loop.create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((record, future))
+        if len(batch) >= self.max_batch or self.window <= 0 or not self._inflight.get(key):
+            self._start_flush(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.window, self._start_flush, key)
+        await future
+
+    def _start_flush(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if batch:
+            self._inflight[key] = self._inflight.get(key, 0) + 1
+            task = asyncio.get_running_loop().create_task(self._flush(key, batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, key, batch):
+        table, columns = key
+        try:
+            async with self.get_connection() as conn:
+                if len(batch) == 1:
+                    await conn.execute(_insert_query(table, columns), *batch[0][0])
+                else:
+                    async with conn.transaction():
+                        await conn.copy_records_to_table(
+                            table, records=[record for record, _ in batch], columns=list(columns)
+                        )
+        except Exception as exc:
+            if len(batch) == 1:
+                self.failed_rows += 1
+                _resolve(batch[0][1], exc)
+                return
+            await self._insert_one_by_one(table, columns, batch)
+        else:
+            self.batches += 1
+            self.batched_rows += len(batch)
+            for _, future in batch:
+                _resolve(future)
+        finally:
+            self._inflight[key] -= 1
+            if not self._inflight[key]:
+                del self._inflight[key]
+                # Group commit: rows that queued up behind this flush go next
+                if self._pending.get(key):
+                    self._start_flush(key)
+
+    async def _insert_one_by_one(self, table, columns, batch):
+        query = _insert_query(table, columns)
+        for record, future in batch:
+            self.retried_rows += 1
+            try:
+                async with self.get_connection() as conn:
+                    await conn.execute(query, *record)
+            except Exception as exc:
+                self.failed_rows += 1
+                _resolve(future, exc)
+            else:
+                _resolve(future)
+
+    async def drain(self):
+        """Flush everything queued and wait for in-flight batches (used at shutdown)"""
+        for key in list(self._pending):
+            self._start_flush(key)
+        while self._flushes:
+            await asyncio.gather(*list(self._flushes), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'window_ms': self.window * 1000,
+            'max_batch': self.max_batch,
+            'pending_rows': sum(len(batch) for batch in self._pending.values()),
+            'inflight_batches': len(self._flushes),
+            'batches': self.batches,
+            'batched_rows': self.batched_rows,
+            'avg_batch_size': round(self.batched_rows / self.batches, 2) if self.batches else 0.0,
+            'retried_rows': self.retried_rows,
+            'failed_rows': self.failed_rows
+        }
+
+
+def _insert_query(table: str, columns: Sequence[str]) -> str:
+    placeholders = ', '.join(f'${i}' for i in range(1, len(columns) + 1))
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+
+def _resolve(future: asyncio.Future, exc: Exception = None):
+    # The caller may have been cancelled; the row is still written
+    if future.done():
+        return
+    if exc is None:
+        future.set_result(None)
+    else:
+        future.set_exception(exc)